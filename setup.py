@@ -56,6 +56,7 @@ if __name__ == "__main__":
         install_requires=install_requirements,
         extras_require={
             'dev': extras_require,
+            'parquet': ['pyarrow'],
         },
 
         zip_safe=False,
@@ -64,6 +65,7 @@ if __name__ == "__main__":
             [console_scripts]
             make_specs=vivarium_csu_swissre_cervical_cancer.tools.cli:make_specs
             make_artifacts=vivarium_csu_swissre_cervical_cancer.tools.cli:make_artifacts
+            make_artifact_comparison=vivarium_csu_swissre_cervical_cancer.tools.cli:make_artifact_comparison
             make_results=vivarium_csu_swissre_cervical_cancer.tools.cli:make_results
         '''
     )
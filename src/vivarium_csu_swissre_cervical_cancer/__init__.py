@@ -9,4 +9,5 @@ from vivarium_csu_swissre_cervical_cancer.constants import data_values
 from vivarium_csu_swissre_cervical_cancer.constants import metadata
 from vivarium_csu_swissre_cervical_cancer.constants import models
 from vivarium_csu_swissre_cervical_cancer.constants import results
+from vivarium_csu_swissre_cervical_cancer.constants import column_registry
 from vivarium_csu_swissre_cervical_cancer.constants import scenarios
@@ -1,6 +1,7 @@
 from vivarium_csu_swissre_cervical_cancer.components.disease import CervicalCancer
 from vivarium_csu_swissre_cervical_cancer.components.hpvvaccineexposure import HpvVaccineExposure
 from vivarium_csu_swissre_cervical_cancer.components.intervention import Intervention
+from vivarium_csu_swissre_cervical_cancer.components.mortality import Mortality
 from vivarium_csu_swissre_cervical_cancer.components.observers import (MortalityObserver,
                                                                        DisabilityObserver,
                                                                        StateMachineObserver,
@@ -1,7 +1,24 @@
+import typing
+
+import numpy as np
+import pandas as pd
 from vivarium_public_health.disease import (DiseaseState as DiseaseState_, DiseaseModel, SusceptibleState,
                                             RateTransition as RateTransition_, RecoveredState)
 
 from vivarium_csu_swissre_cervical_cancer import models, data_keys, data_values
+from vivarium_csu_swissre_cervical_cancer.utilities import load_draw_data
+
+if typing.TYPE_CHECKING:
+    from vivarium.framework.engine import Builder
+
+
+PREVALENCE_KEYS = {
+    models.HIGH_RISK_HPV_STATE_NAME: data_keys.CERVICAL_CANCER.HRHPV_PREVALENCE,
+    models.BENIGN_CANCER_STATE_NAME: data_keys.CERVICAL_CANCER.BCC_PREVALENCE,
+    models.BENIGN_CANCER_WITH_HPV_STATE_NAME: data_keys.CERVICAL_CANCER.BCC_PREVALENCE_WITH_HRHPV,
+    models.INVASIVE_CANCER_STATE_NAME: data_keys.CERVICAL_CANCER.PREVALENCE,
+    models.INVASIVE_CANCER_WITH_HPV_STATE_NAME: data_keys.CERVICAL_CANCER.PREVALENCE_WITH_HRHPV,
+}
 
 
 class RateTransition(RateTransition_):
@@ -29,12 +46,98 @@ class DiseaseState(DiseaseState_):
         return t
 
 
+class CervicalCancerModel(DiseaseModel):
+    """Disease model that draws initial states from a single joint prevalence lookup.
+
+    The per-state prevalence tables are replaced by one table holding the
+    prevalence of every state in :data:`PREVALENCE_KEYS` on a shared age and
+    year grid, so initialization does one lookup and one ``searchsorted``
+    for the whole population.
+
+    """
+
+    # noinspection PyAttributeOutsideInit
+    def setup(self, builder: 'Builder'):
+        super().setup(builder)
+        self.prevalence_state_names = list(PREVALENCE_KEYS)
+        self.joint_prevalence = builder.lookup.build_table(load_joint_prevalence_data(builder),
+                                                           key_columns=['sex'],
+                                                           parameter_columns=['age', 'year'],
+                                                           value_columns=self.prevalence_state_names)
+
+    def get_state_weights(self, pop_index, prevalence_type):
+        if prevalence_type != 'prevalence':
+            return super().get_state_weights(pop_index, prevalence_type)
+
+        weights = self.joint_prevalence(pop_index)[self.prevalence_state_names].values
+        # Prevalence lookups may be single precision. Accumulate the bins in double precision.
+        weights_bins = np.cumsum(weights, axis=1, dtype=np.float64)
+        # The initial state takes up the remaining probability mass.
+        weights_bins = np.hstack([weights_bins, np.ones((len(weights_bins), 1))])
+        state_names = self.prevalence_state_names + [self.initial_state]
+        return state_names, weights_bins
+
+    @staticmethod
+    def assign_initial_status_to_simulants(simulants_df, state_names, weights_bins, propensities):
+        simulants = simulants_df[['age', 'sex']].copy()
+
+        # Offset each simulant's cumulative bins into a disjoint interval so a single
+        # searchsorted over the flattened bins resolves every simulant at once.
+        n_simulants, n_states = weights_bins.shape
+        rows = np.arange(n_simulants)
+        flat_bins = (np.clip(weights_bins, 0, 1) + 2 * rows[:, np.newaxis]).ravel()
+        positions = np.searchsorted(flat_bins, propensities.values + 2 * rows, side='left')
+        choice_index = np.minimum(positions - rows * n_states, n_states - 1)
+
+        simulants.loc[:, 'condition_state'] = pd.Series(np.array(state_names)[choice_index], index=simulants.index)
+        return simulants
+
+
+def load_joint_prevalence_data(builder: 'Builder') -> pd.DataFrame:
+    """Loads the prevalence of every prevalent cervical cancer state onto one age and year grid.
+
+    Each key is looked up on its own bins, so the grid is the union of all age
+    and year bin edges and each source is sampled at the bin containing each
+    grid cell (clamped at the edges, matching order 0 extrapolation).
+
+    """
+    data = {state: load_draw_data(builder, key) for state, key in PREVALENCE_KEYS.items()}
+
+    sexes = sorted(set().union(*[df['sex'].unique() for df in data.values()]))
+    age_edges = np.unique(np.concatenate([df[['age_start', 'age_end']].values.ravel() for df in data.values()]))
+    year_edges = np.unique(np.concatenate([df[['year_start', 'year_end']].values.ravel() for df in data.values()]))
+
+    grid = pd.MultiIndex.from_product([sexes, range(len(age_edges) - 1), range(len(year_edges) - 1)],
+                                      names=['sex', 'age_bin', 'year_bin']).to_frame(index=False)
+    age_bin, year_bin = grid.pop('age_bin').values, grid.pop('year_bin').values
+    grid['age_start'], grid['age_end'] = age_edges[age_bin], age_edges[age_bin + 1]
+    grid['year_start'], grid['year_end'] = year_edges[year_bin], year_edges[year_bin + 1]
+
+    for state, df in data.items():
+        source_sexes = np.array(sorted(df['sex'].unique()))
+        source_ages = np.sort(df['age_start'].unique())
+        source_years = np.sort(df['year_start'].unique())
+        dense = (df.set_index(['sex', 'age_start', 'year_start'])['value']
+                 .reindex(pd.MultiIndex.from_product([source_sexes, source_ages, source_years]))
+                 .fillna(0)
+                 .values
+                 .reshape(len(source_sexes), len(source_ages), len(source_years)))
+        sex_index = np.searchsorted(source_sexes, grid['sex'].values).clip(0, len(source_sexes) - 1)
+        age_index = (np.searchsorted(source_ages, grid['age_start'].values, side='right') - 1).clip(0)
+        year_index = (np.searchsorted(source_years, grid['year_start'].values, side='right') - 1).clip(0)
+        values = dense[sex_index, age_index, year_index]
+        grid[state] = np.where(source_sexes[sex_index] == grid['sex'].values, values, 0)
+
+    return grid
+
+
 def CervicalCancer():
     susceptible = SusceptibleState(models.CERVICAL_CANCER_MODEL_NAME)
     hrhpv = DiseaseState(
         models.HIGH_RISK_HPV_STATE_NAME,
         cause_type='sequela',
         get_data_functions={
+            'prevalence': lambda *_: 0,
             'disability_weight': lambda *_: 0,
             'excess_mortality_rate': lambda *_: 0,
         },
@@ -43,6 +146,7 @@ def CervicalCancer():
         models.BENIGN_CANCER_STATE_NAME,
         cause_type='sequela',
         get_data_functions={
+            'prevalence': lambda *_: 0,
             'disability_weight': lambda *_: 0,
             'excess_mortality_rate': lambda *_: 0,
         },
@@ -51,20 +155,29 @@ def CervicalCancer():
         models.BENIGN_CANCER_WITH_HPV_STATE_NAME,
         cause_type='sequela',
         get_data_functions={
+            'prevalence': lambda *_: 0,
             'disability_weight': lambda *_: 0,
             'excess_mortality_rate': lambda *_: 0,
         },
     )
     cervical_cancer = DiseaseState(
         models.INVASIVE_CANCER_STATE_NAME,
+        get_data_functions={
+            'prevalence': lambda *_: 0,
+            'disability_weight': lambda _, builder: load_draw_data(
+                builder, data_keys.CERVICAL_CANCER.DISABILITY_WEIGHT),
+            'excess_mortality_rate': lambda _, builder: load_draw_data(
+                builder, data_keys.CERVICAL_CANCER.EMR),
+        },
     )
     cervical_cancer_with_hrhpv = DiseaseState(
         models.INVASIVE_CANCER_WITH_HPV_STATE_NAME,
         get_data_functions={
-            'disability_weight': lambda _, builder: builder.data.load(
-                data_keys.CERVICAL_CANCER.DISABILITY_WEIGHT),
-            'excess_mortality_rate': lambda _, builder: builder.data.load(
-                data_keys.CERVICAL_CANCER.EMR),
+            'prevalence': lambda *_: 0,
+            'disability_weight': lambda _, builder: load_draw_data(
+                builder, data_keys.CERVICAL_CANCER.DISABILITY_WEIGHT),
+            'excess_mortality_rate': lambda _, builder: load_draw_data(
+                builder, data_keys.CERVICAL_CANCER.EMR),
         },
     )
     recovered = RecoveredState(models.CERVICAL_CANCER_MODEL_NAME)
@@ -75,14 +188,16 @@ def CervicalCancer():
         hrhpv,
         source_data_type='rate',
         get_data_functions={
-            'incidence_rate': lambda _, builder: builder.data.load(data_keys.CERVICAL_CANCER.HRHPV_INCIDENCE_RATE)
+            'incidence_rate':
+                lambda _, builder: load_draw_data(builder, data_keys.CERVICAL_CANCER.HRHPV_INCIDENCE_RATE)
         }
     )
     susceptible.add_transition(
         bcc,
         source_data_type='rate',
         get_data_functions={
-            'incidence_rate': lambda _, builder: builder.data.load(data_keys.CERVICAL_CANCER.BCC_HPV_NEG_INCIDENCE_RATE)
+            'incidence_rate':
+                lambda _, builder: load_draw_data(builder, data_keys.CERVICAL_CANCER.BCC_HPV_NEG_INCIDENCE_RATE)
         }
     )
 
@@ -93,7 +208,7 @@ def CervicalCancer():
         source_data_type='rate',
         get_data_functions={
             'transition_rate':
-                lambda builder, *_: builder.data.load(data_keys.CERVICAL_CANCER.BCC_HPV_POS_INCIDENCE_RATE)
+                lambda builder, *_: load_draw_data(builder, data_keys.CERVICAL_CANCER.BCC_HPV_POS_INCIDENCE_RATE)
         }
     )
     hrhpv.add_transition(
@@ -101,7 +216,7 @@ def CervicalCancer():
         source_data_type='rate',
         get_data_functions={
             'transition_rate':
-                lambda builder, *_: builder.data.load(data_keys.CERVICAL_CANCER.HRHPV_REMISSION_RATE)
+                lambda builder, *_: load_draw_data(builder, data_keys.CERVICAL_CANCER.HRHPV_REMISSION_RATE)
         }
     )
 
@@ -120,7 +235,7 @@ def CervicalCancer():
         source_data_type='rate',
         get_data_functions={
             'transition_rate':
-                lambda builder, *_: builder.data.load(data_keys.CERVICAL_CANCER.HRHPV_INCIDENCE_RATE)
+                lambda builder, *_: load_draw_data(builder, data_keys.CERVICAL_CANCER.HRHPV_INCIDENCE_RATE)
         }
     )
 
@@ -139,7 +254,7 @@ def CervicalCancer():
         source_data_type='rate',
         get_data_functions={
             'transition_rate':
-                lambda builder, *_: builder.data.load(data_keys.CERVICAL_CANCER.HRHPV_REMISSION_RATE)
+                lambda builder, *_: load_draw_data(builder, data_keys.CERVICAL_CANCER.HRHPV_REMISSION_RATE)
         }
     )
 
@@ -158,7 +273,7 @@ def CervicalCancer():
         source_data_type='rate',
         get_data_functions={
             'transition_rate':
-                lambda builder, *_: builder.data.load(data_keys.CERVICAL_CANCER.HRHPV_INCIDENCE_RATE)
+                lambda builder, *_: load_draw_data(builder, data_keys.CERVICAL_CANCER.HRHPV_INCIDENCE_RATE)
         }
     )
 
@@ -177,12 +292,18 @@ def CervicalCancer():
         source_data_type='rate',
         get_data_functions={
             'transition_rate':
-                lambda builder, *_: builder.data.load(data_keys.CERVICAL_CANCER.HRHPV_REMISSION_RATE)
+                lambda builder, *_: load_draw_data(builder, data_keys.CERVICAL_CANCER.HRHPV_REMISSION_RATE)
         }
     )
 
     # Add transitions for Recovered state
     recovered.allow_self_transitions()
 
-    return DiseaseModel('cervical_cancer', states=[susceptible, hrhpv, bcc, bcc_with_hrhpv,
-                                                   cervical_cancer, cervical_cancer_with_hrhpv, recovered])
+    return CervicalCancerModel(
+        'cervical_cancer',
+        states=[susceptible, hrhpv, bcc, bcc_with_hrhpv, cervical_cancer, cervical_cancer_with_hrhpv, recovered],
+        get_data_functions={
+            'cause_specific_mortality_rate':
+                lambda _, builder: load_draw_data(builder, data_keys.CERVICAL_CANCER.CSMR),
+        },
+    )
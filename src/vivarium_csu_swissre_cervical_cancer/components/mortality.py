@@ -0,0 +1,44 @@
+import typing
+
+from vivarium_public_health.population import Mortality as Mortality_
+
+from vivarium_csu_swissre_cervical_cancer import data_keys
+from vivarium_csu_swissre_cervical_cancer.utilities import load_draw_data
+
+if typing.TYPE_CHECKING:
+    from vivarium.framework.engine import Builder
+
+
+class Mortality(Mortality_):
+    """All cause mortality read with :func:`load_draw_data`.
+
+    All cause mortality may be stored by province, so it has to be combined
+    with the artifact's province weights before it can be used.
+    """
+
+    def setup(self, builder: 'Builder'):
+        all_cause_mortality_data = load_draw_data(builder, data_keys.POPULATION.ACMR)
+        self.all_cause_mortality_rate = builder.lookup.build_table(all_cause_mortality_data, key_columns=['sex'],
+                                                                   parameter_columns=['age', 'year'])
+
+        self.cause_specific_mortality_rate = builder.value.register_value_producer(
+            'cause_specific_mortality_rate', source=builder.lookup.build_table(0)
+        )
+
+        self.mortality_rate = builder.value.register_rate_producer('mortality_rate',
+                                                                   source=self.calculate_mortality_rate,
+                                                                   requires_columns=['age', 'sex'])
+
+        life_expectancy_data = builder.data.load(data_keys.POPULATION.TMRLE)
+        self.life_expectancy = builder.lookup.build_table(life_expectancy_data, parameter_columns=['age'])
+
+        self.random = builder.randomness.get_stream('mortality_handler')
+        self.clock = builder.time.clock()
+
+        columns_created = ['cause_of_death', 'years_of_life_lost']
+        view_columns = columns_created + ['alive', 'exit_time', 'age', 'sex', 'location']
+        self.population_view = builder.population.get_view(view_columns)
+        builder.population.initializes_simulants(self.on_initialize_simulants,
+                                                 creates_columns=columns_created)
+
+        builder.event.register_listener('time_step', self.on_time_step, priority=0)
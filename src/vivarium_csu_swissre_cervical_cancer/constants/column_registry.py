@@ -0,0 +1,101 @@
+"""Registry of the result columns that results processing reads.
+
+Expanding the column templates in ``results`` means formatting the full
+product of their fields, so the registry does it once, on first use, and
+keeps hash-based indices over the result. The standard columns come first,
+followed by the columns of each template in ``results.COLUMN_TEMPLATES``
+order, matching ``results.RESULT_COLUMNS()``.
+
+The observers don't build or check their columns against the registry.
+Their column names depend on the metrics configuration of a run and on the
+causes vivarium_public_health observes, so simulation output can hold
+columns that aren't registered. Results processing only reads registered
+columns.
+
+"""
+from functools import lru_cache
+import itertools
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from vivarium_csu_swissre_cervical_cancer.constants import results
+
+
+class ResultColumnRegistry:
+    """Columns of each result measure with constant time lookups by column name.
+
+    Standard columns are registered under their key in
+    ``results.STANDARD_COLUMNS`` with no template fields.
+
+    """
+
+    def __init__(self):
+        self._columns = {}
+        self._index = {}
+        self._positions = {}
+        position = 0
+        for measure, column in results.STANDARD_COLUMNS.items():
+            self._register(measure, [(column, {})], position)
+            position += 1
+        for measure, template in results.COLUMN_TEMPLATES.items():
+            self._register(measure, list(expand_template(template)), position)
+            position += len(self._columns[measure])
+        self._all_columns = [column for measure in self._columns for column in self._columns[measure]]
+        self._column_set = frozenset(self._all_columns)
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._column_set
+
+    def __len__(self) -> int:
+        return len(self._all_columns)
+
+    def get_columns(self, measure: str = 'all') -> List[str]:
+        """Gets the columns of a measure, or every column for ``'all'``.
+
+        Raises
+        ------
+        ValueError
+            If the measure is not a column template or standard column.
+
+        """
+        if measure == 'all':
+            return list(self._all_columns)
+        if measure not in self._columns:
+            raise ValueError(f'Unknown result column type {measure}')
+        return list(self._columns[measure])
+
+    def get_measure(self, column: str) -> str:
+        """Gets the measure a column belongs to."""
+        return self._index[column][0]
+
+    def get_fields(self, column: str) -> Dict[str, Any]:
+        """Gets the template field values a column was formatted with."""
+        return dict(self._index[column][1])
+
+    def get_positions(self, measure: str) -> np.ndarray:
+        """Gets the positions of a measure's columns in ``get_columns('all')``."""
+        if measure not in self._positions:
+            raise ValueError(f'Unknown result column type {measure}')
+        return self._positions[measure].copy()
+
+    def _register(self, measure: str, columns: List[Tuple[str, Dict[str, Any]]], position: int):
+        self._columns[measure] = [column for column, _ in columns]
+        self._positions[measure] = np.arange(position, position + len(columns))
+        for column, fields in columns:
+            self._index.setdefault(column, (measure, fields))
+
+
+def expand_template(template: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yields each column of a template with the field values that format it."""
+    filtered_field_map = {field: values
+                          for field, values in results.TEMPLATE_FIELD_MAP.items() if f'{{{field}}}' in template}
+    fields = list(filtered_field_map)
+    for value_group in itertools.product(*filtered_field_map.values()):
+        field_values = dict(zip(fields, value_group))
+        yield template.format(**field_values), field_values
+
+
+@lru_cache()
+def get_registry() -> ResultColumnRegistry:
+    return ResultColumnRegistry()
@@ -8,6 +8,9 @@ from vivarium_public_health.utilities import TargetString
 #############
 
 METADATA_LOCATIONS = 'metadata.locations'
+METADATA_DRAWS = 'metadata.draws'
+METADATA_PROVENANCE = 'metadata.provenance'
+METADATA_PROVINCE_WEIGHTS = 'metadata.province_weights'
 
 SWISSRE_LOCATION_WEIGHTS = {
     'Tianjin': 0.18,
@@ -52,12 +55,13 @@ class __CervicalCancer(NamedTuple):
     DISABILITY_WEIGHT: TargetString = TargetString('cause.invasive_cervical_cancer.disability_weight')
     EMR: TargetString = TargetString('cause.invasive_cervical_cancer.excess_mortality_rate')
     CSMR: TargetString = TargetString('cause.cervical_cancer.cause_specific_mortality_rate')
+    # Combined with the cause specific mortality rate into excess mortality for reweighted provinces.
+    RAW_ICC_PREVALENCE: TargetString = TargetString('cause.raw_invasive_cervical_cancer.prevalence')
     RESTRICTIONS: TargetString = TargetString('cause.cervical_cancer.restrictions')
 
     # Useful keys not for the artifact
     RAW_BCC_PREVALENCE = TargetString('sequela.raw_benign_cervical_cancer.prevalence')
     RAW_BCC_INCIDENCE_RATE = TargetString('sequela.raw_benign_cervical_cancer.incidence_rate')
-    RAW_ICC_PREVALENCE = TargetString('cause.raw_invasive_cervical_cancer.prevalence')
 
     @property
     def name(self):
@@ -74,3 +78,34 @@ MAKE_ARTIFACT_KEY_GROUPS = [
     POPULATION,
     CERVICAL_CANCER
 ]
+
+# Large draw-level keys that are only read by project components and so
+# can be stored and read one draw at a time.
+BY_DRAW_KEYS = [key for key in CERVICAL_CANCER if key != CERVICAL_CANCER.RESTRICTIONS]
+
+# Keys whose draws are stored in double precision even in float32 artifacts.
+# All-cause mortality is applied to every simulant on every time step.
+FLOAT64_KEYS = [POPULATION.ACMR]
+
+# Keys weighted by province, which can be stored once per province and
+# weighted at load time instead of at build time. Each is linear in the
+# per-province forecasts, except those in PROVINCE_RATIO_KEYS.
+PROVINCE_SHARD_KEYS = [
+    POPULATION.ACMR,
+    CERVICAL_CANCER.BCC_PREVALENCE,
+    CERVICAL_CANCER.BCC_PREVALENCE_WITH_HRHPV,
+    CERVICAL_CANCER.PREVALENCE,
+    CERVICAL_CANCER.PREVALENCE_WITH_HRHPV,
+    CERVICAL_CANCER.BCC_HPV_POS_INCIDENCE_RATE,
+    CERVICAL_CANCER.BCC_HPV_NEG_INCIDENCE_RATE,
+    CERVICAL_CANCER.DISABILITY_WEIGHT,
+    CERVICAL_CANCER.EMR,
+    CERVICAL_CANCER.CSMR,
+    CERVICAL_CANCER.RAW_ICC_PREVALENCE,
+]
+
+# Province sharded keys that are ratios of weighted quantities, by the keys
+# whose combined values are their numerator and denominator.
+PROVINCE_RATIO_KEYS = {
+    CERVICAL_CANCER.EMR: (CERVICAL_CANCER.CSMR, CERVICAL_CANCER.RAW_ICC_PREVALENCE),
+}
@@ -9,7 +9,16 @@ CLUSTER_QUEUE = 'all.q'
 MAKE_ARTIFACT_MEM = '10G'
 MAKE_ARTIFACT_CPU = '1'
 MAKE_ARTIFACT_RUNTIME = '3:00:00'
-MAKE_ARTIFACT_SLEEP = 10
+MAKE_ARTIFACT_FETCH_THREADS = 8
+# Rows of a raw forecast file read into memory at once.
+MAKE_ARTIFACT_CSV_CHUNK_SIZE = 1_000_000
+# Parsed raw forecast files held in memory at once while building an artifact.
+MAKE_ARTIFACT_MEMORY_CACHE_SIZE = 4
+# Rows of the simulation output read into memory at once by make_results.
+MAKE_RESULTS_CHUNK_SIZE = 500
+
+# Number of input draws available in the raw data.
+DRAW_COUNT = 1000
 
 LOCATIONS = [
     'SwissRE Coverage',
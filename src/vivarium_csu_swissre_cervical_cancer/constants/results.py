@@ -1,5 +1,3 @@
-import itertools
-
 from vivarium_csu_swissre_cervical_cancer import models
 
 #################################
@@ -81,18 +79,5 @@ TEMPLATE_FIELD_MAP = {
 
 
 def RESULT_COLUMNS(kind='all'):
-    if kind not in COLUMN_TEMPLATES and kind != 'all':
-        raise ValueError(f'Unknown result column type {kind}')
-    columns = []
-    if kind == 'all':
-        for k in COLUMN_TEMPLATES:
-            columns += RESULT_COLUMNS(k)
-        columns = list(STANDARD_COLUMNS.values()) + columns
-    else:
-        template = COLUMN_TEMPLATES[kind]
-        filtered_field_map = {field: values
-                              for field, values in TEMPLATE_FIELD_MAP.items() if f'{{{field}}}' in template}
-        fields, value_groups = filtered_field_map.keys(), itertools.product(*filtered_field_map.values())
-        for value_group in value_groups:
-            columns.append(template.format(**{field: value for field, value in zip(fields, value_group)}))
-    return columns
+    from vivarium_csu_swissre_cervical_cancer.constants.column_registry import get_registry
+    return get_registry().get_columns(kind)
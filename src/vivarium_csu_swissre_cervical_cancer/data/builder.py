@@ -9,17 +9,22 @@ Some degree of verbosity/boilerplate is fine in the interest of transparancy.
    Logging in this module should be done at the ``debug`` level.
 
 """
+import hashlib
+import inspect
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, List
 
 import pandas as pd
 from loguru import logger
 from vivarium.framework.artifact import Artifact, get_location_term, EntityKey
 
-from vivarium_csu_swissre_cervical_cancer import data_keys
-from vivarium_csu_swissre_cervical_cancer.data import loader
+from vivarium_csu_swissre_cervical_cancer import data_keys, metadata, utilities
+from vivarium_csu_swissre_cervical_cancer.data import cache, loader
+from vivarium_csu_swissre_cervical_cancer.utilities import read_data_by_draw
 
 
-def open_artifact(output_path: Path, location: str) -> Artifact:
+def open_artifact(output_path: Path, location: str, draws: List[int] = None) -> Artifact:
     """Creates or opens an artifact at the output path.
 
     Parameters
@@ -28,11 +33,18 @@ def open_artifact(output_path: Path, location: str) -> Artifact:
         Fully resolved path to the artifact file.
     location
         Proper GBD location name represented by the artifact.
+    draws
+        The input draws held by the artifact. Defaults to all draws.
 
     Returns
     -------
         A new artifact.
 
+    Raises
+    ------
+    ValueError
+        If appending to an existing artifact that holds different draws.
+
     """
     if not output_path.exists():
         logger.debug(f"Creating artifact at {str(output_path)}.")
@@ -45,11 +57,28 @@ def open_artifact(output_path: Path, location: str) -> Artifact:
     if key not in artifact:
         artifact.write(key, [location])
 
+    draws = list(range(metadata.DRAW_COUNT)) if draws is None else sorted(draws)
+    key = data_keys.METADATA_DRAWS
+    if key not in artifact:
+        artifact.write(key, draws)
+    elif list(artifact.load(key)) != draws:
+        raise ValueError(f'Artifact at {str(output_path)} holds draws {artifact.load(key)}, '
+                         f'which do not match the requested draws {draws}.')
+
+    # Province sharded keys are weighted with these at load time.  Weights already in the artifact are
+    # left alone so that appending sharded keys doesn't undo a reweighting.  They are rewritten with any
+    # key weighted at build time instead, in ``write_key_data``.
+    key = data_keys.METADATA_PROVINCE_WEIGHTS
+    if key not in artifact:
+        artifact.write(key, data_keys.SWISSRE_LOCATION_WEIGHTS)
+
     return artifact
 
 
-def load_and_write_data(artifact: Artifact, key: str, location: str):
-    """Loads data and writes it to the artifact if not already present.
+def load_and_write_data(artifact: Artifact, key: str, location: str, draws: List[int] = None,
+                        by_draw: bool = False, float32: bool = False, by_province: bool = False,
+                        verify: bool = False):
+    """Loads data and writes it to the artifact if not already present and up to date.
 
     Parameters
     ----------
@@ -60,16 +89,206 @@ def load_and_write_data(artifact: Artifact, key: str, location: str):
     location
         The location associated with the data to load and the artifact to
         write to.
+    draws
+        The input draws to load. Defaults to all draws.
+    by_draw
+        Whether to store keys in ``data_keys.BY_DRAW_KEYS`` one column per
+        draw so the simulation can read a single draw.
+    float32
+        Whether to store draw columns in single precision. Keys in
+        ``data_keys.FLOAT64_KEYS`` are always stored in double precision.
+    by_province
+        Whether to store keys in ``data_keys.PROVINCE_SHARD_KEYS`` once per
+        province, to be weighted when the simulation loads them.
+    verify
+        Whether to read newly written data back from the artifact to check
+        it.
 
     """
-    if key in artifact:
-        logger.debug(f'Data for {key} already in artifact.  Skipping...')
+    if is_up_to_date(artifact, key, location, draws, by_draw, float32, by_province):
+        logger.debug(f'Data for {key} already in artifact and up to date.  Skipping...')
     else:
         logger.debug(f'Loading data for {key} for location {location}.')
-        data = loader.get_data(key, location)
-        logger.debug(f'Writing data for {key} to artifact.')
+        data = load_data(key, location, draws, by_province)
+        write_key_data(artifact, key, data, location, draws, by_draw, float32, by_province, verify)
+
+
+def load_data(key: str, location: str, draws: List[int] = None, by_province: bool = False):
+    """Loads data for key, by province if requested and the key supports it."""
+    if is_stored_by_province(key, by_province):
+        return loader.get_province_data(key, location, draws)
+    return loader.get_data(key, location, draws)
+
+
+def get_provenance_hash(key: str, location: str, draws: List[int] = None, by_draw: bool = False,
+                        float32: bool = False, by_province: bool = False) -> str:
+    """Hashes everything the data for a key is derived from.
+
+    This covers the code that computes and writes the data, the key's
+    source files, the project constants it uses, the location and draws
+    requested and how the data is stored. Province weights are left out for province sharded keys,
+    since they are only applied at load time.
+
+    Parameters
+    ----------
+    key
+        The entity key associated with the data.
+    location
+        The location associated with the data.
+    draws
+        The input draws of the data. Defaults to all draws.
+    by_draw
+        Whether storage one column per draw is requested.
+    float32
+        Whether draw columns are requested in single precision.
+    by_province
+        Whether province sharding is requested.
+
+    Returns
+    -------
+        A hex digest that changes whenever any of the inputs do.
+
+    """
+    source_files, constants = loader.get_provenance_inputs(key)
+    if is_stored_by_province(key, by_province) and 'SWISSRE_LOCATION_WEIGHTS' in constants:
+        constants['SWISSRE_LOCATION_WEIGHTS'] = sorted(constants['SWISSRE_LOCATION_WEIGHTS'])
+    draws = list(range(metadata.DRAW_COUNT)) if draws is None else sorted(draws)
+    signature = '|'.join(
+        [key, location, ','.join([str(draw) for draw in draws]), _get_code_version(),
+         'by_draw' if by_draw and key in data_keys.BY_DRAW_KEYS else 'by_column',
+         'float32' if _is_stored_as_float32(key, float32) else 'float64',
+         'by_province' if is_stored_by_province(key, by_province) else 'combined']
+        + [cache.get_file_signature(source_file) for source_file in source_files]
+        + [f'{name}={constants[name]!r}' for name in sorted(constants)]
+    )
+    return hashlib.sha1(signature.encode()).hexdigest()
+
+
+def is_up_to_date(artifact: Artifact, key: str, location: str, draws: List[int] = None,
+                  by_draw: bool = False, float32: bool = False, by_province: bool = False) -> bool:
+    """Whether the artifact holds data for key built from the current inputs."""
+    if key not in artifact or data_keys.METADATA_PROVENANCE not in artifact:
+        return False
+    stored = artifact.load(data_keys.METADATA_PROVENANCE).get(key)
+    return stored == get_provenance_hash(key, location, draws, by_draw, float32, by_province)
+
+
+def write_key_data(artifact: Artifact, key: str, data: pd.DataFrame, location: str, draws: List[int] = None,
+                   by_draw: bool = False, float32: bool = False, by_province: bool = False, verify: bool = False):
+    """Writes data for key, replacing stale data, and records its provenance.
+
+    Parameters
+    ----------
+    artifact
+        The artifact to write to.
+    key
+        The entity key associated with the data to write.
+    data
+        The data to write.
+    location
+        The location associated with the data.
+    draws
+        The input draws of the data. Defaults to all draws.
+    by_draw
+        Whether to store keys in ``data_keys.BY_DRAW_KEYS`` one column per
+        draw.
+    float32
+        Whether to store draw columns in single precision. Keys in
+        ``data_keys.FLOAT64_KEYS`` are always stored in double precision.
+    by_province
+        Whether data for keys in ``data_keys.PROVINCE_SHARD_KEYS`` was loaded
+        by province.
+    verify
+        Whether to read the data back from the artifact to check it.
+
+    Raises
+    ------
+    ValueError
+        If verifying and the data read back does not match the data written.
+
+    """
+    by_draw = by_draw and key in data_keys.BY_DRAW_KEYS
+    if _is_stored_as_float32(key, float32) and isinstance(data, pd.DataFrame):
+        data = data.astype({c: 'float32' for c in data.columns if c.startswith('draw_')})
+    if key in artifact:
+        logger.debug(f'Data for {key} is out of date.  Replacing...')
+        artifact.remove(key)
+    logger.debug(f'Writing data for {key} to artifact{" by draw" if by_draw else ""}.')
+    if by_draw:
+        write_data_by_draw(artifact, key, data)
+    else:
         artifact.write(key, data)
-    return artifact.load(key)
+
+    provenance = {}
+    if data_keys.METADATA_PROVENANCE in artifact:
+        provenance = dict(artifact.load(data_keys.METADATA_PROVENANCE))
+        artifact.remove(data_keys.METADATA_PROVENANCE)
+    provenance[str(key)] = get_provenance_hash(key, location, draws, by_draw, float32, by_province)
+    artifact.write(data_keys.METADATA_PROVENANCE, provenance)
+
+    if _is_weighted_at_build(key, by_province):
+        # Record the weights this key was built with, so they are also used for any sharded keys.
+        logger.debug(f'Recording province weights {key} was built with.')
+        if data_keys.METADATA_PROVINCE_WEIGHTS in artifact:
+            artifact.remove(data_keys.METADATA_PROVINCE_WEIGHTS)
+        artifact.write(data_keys.METADATA_PROVINCE_WEIGHTS, data_keys.SWISSRE_LOCATION_WEIGHTS)
+
+    if verify:
+        logger.debug(f'Verifying data for {key}.')
+        _verify_key_data(artifact, key, data, by_draw)
+
+
+def is_stored_by_province(key: str, by_province: bool) -> bool:
+    return by_province and key in data_keys.PROVINCE_SHARD_KEYS
+
+
+def _is_weighted_at_build(key: str, by_province: bool) -> bool:
+    _, constants = loader.get_provenance_inputs(key)
+    return 'SWISSRE_LOCATION_WEIGHTS' in constants and not is_stored_by_province(key, by_province)
+
+
+def _is_stored_as_float32(key: str, float32: bool) -> bool:
+    return float32 and key not in data_keys.FLOAT64_KEYS
+
+
+def _verify_key_data(artifact: Artifact, key: str, data: Any, by_draw: bool):
+    """Reads data for key back the way the simulation will and checks it matches what was written."""
+    try:
+        if by_draw:
+            # Every draw is read back on its own, as a simulation would.
+            expected_index = data.index.to_frame(index=False)
+            for column in data.columns:
+                written = read_data_by_draw(artifact.path, key, int(column.split('_')[-1]))
+                expected = expected_index.assign(value=data[column].values)
+                expected = expected.drop(columns=[c for c in ['location', 'draw'] if c in expected.columns])
+                pd.testing.assert_frame_equal(written, expected)
+        else:
+            artifact.clear_cache()
+            written = artifact.load(key)
+            if isinstance(data, pd.DataFrame):
+                pd.testing.assert_frame_equal(written, data)
+            elif isinstance(data, pd.Series):
+                pd.testing.assert_series_equal(written, data)
+            elif written != data:
+                raise AssertionError(f'{written!r} != {data!r}')
+    except AssertionError as e:
+        raise ValueError(f'Data read back for {key} does not match the data written.\n{e}')
+
+
+@lru_cache(maxsize=None)
+def _get_code_version() -> str:
+    """Hashes the source of the code that computes or writes key data, so changing any of it invalidates it.
+
+    Simulation-side helpers in :mod:`vivarium_csu_swissre_cervical_cancer.utilities`
+    don't affect the data, so only the functions the data package uses from
+    there are hashed.
+    """
+    sha = hashlib.sha1()
+    for module_path in [loader.__file__, cache.__file__, __file__]:
+        sha.update(Path(module_path).read_bytes())
+    for function in [utilities.get_lognormal_random_variables]:
+        sha.update(inspect.getsource(function).encode())
+    return sha.hexdigest()
 
 
 def write_data(artifact: Artifact, key: str, data: pd.DataFrame):
@@ -93,11 +312,10 @@ def write_data(artifact: Artifact, key: str, data: pd.DataFrame):
     return artifact.load(key)
 
 
-# TODO - writing and reading by draw is necessary if you are using
-#        LBWSG data. Find the read function in utilities.py
 def write_data_by_draw(artifact: Artifact, key: str, data: pd.DataFrame):
     """Writes data to the artifact on a per-draw basis. This is useful
-    for large datasets like Low Birthweight Short Gestation (LBWSG).
+    for large datasets where a simulation only needs a single draw. Read it
+    back with :func:`vivarium_csu_swissre_cervical_cancer.utilities.read_data_by_draw`.
 
     Parameters
     ----------
@@ -109,10 +327,10 @@ def write_data_by_draw(artifact: Artifact, key: str, data: pd.DataFrame):
         The data to write.
 
     """
+    key = EntityKey(key)
     with pd.HDFStore(artifact.path, complevel=9, mode='a') as store:
-        key = EntityKey(key)
-        artifact._keys.append(key)
         store.put(f'{key.path}/index', data.index.to_frame(index=False))
         data = data.reset_index(drop=True)
         for c in data.columns:
             store.put(f'{key.path}/{c}', data[c])
+    artifact._keys.append(key)
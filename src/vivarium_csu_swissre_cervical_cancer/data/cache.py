@@ -0,0 +1,149 @@
+"""Caches for intermediate data shared between artifact keys.
+
+Several artifact keys are different transforms of the same large raw
+forecast files. This module lets the loader parse each of those files once
+per build and, when a cache directory is configured, persist the parsed
+intermediate to disk so later builds can skip parsing entirely.
+
+Cached entries are keyed on the resolved path, size and modification time
+of every source file, and on any versions the caller supplies, so editing
+or replacing a raw file invalidates its entries automatically. Entries are
+written to a temporary file and moved into place, and an entry that cannot
+be read is treated as a miss. Only the most recently used entries are held
+in memory.
+
+.. admonition::
+
+   Logging in this module should be done at the ``debug`` level.
+
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Union
+
+import pandas as pd
+from loguru import logger
+
+from vivarium_csu_swissre_cervical_cancer import metadata
+
+_CACHE_DIR: Optional[Path] = None
+_MEMORY_CACHE: 'OrderedDict[str, pd.DataFrame]' = OrderedDict()
+_MEMORY_LOCK = threading.Lock()
+# HDF5 is not safe to access from several threads at once.
+_DISK_LOCK = threading.Lock()
+
+
+def set_cache_dir(cache_dir: Union[str, Path, None]):
+    """Sets the directory where parsed intermediates are persisted.
+
+    Parameters
+    ----------
+    cache_dir
+        The directory to use. It will be created if it does not exist.
+        If ``None``, intermediates are only cached in memory.
+
+    """
+    global _CACHE_DIR
+    _CACHE_DIR = Path(cache_dir) if cache_dir is not None else None
+    if _CACHE_DIR is not None:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def get_cache_dir() -> Optional[Path]:
+    return _CACHE_DIR
+
+
+def clear_memory_cache():
+    with _MEMORY_LOCK:
+        _MEMORY_CACHE.clear()
+
+
+def get_file_signature(path: Union[str, Path]) -> str:
+    """Returns a string identifying the current contents of a file by path, size and mtime."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    return f'{str(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def get_cache_key(name: str, sources: List[Union[str, Path]], versions: Sequence[str] = ()) -> str:
+    signature = '|'.join([name] + [get_file_signature(source) for source in sources] + list(versions))
+    return f'{name}_{hashlib.sha1(signature.encode()).hexdigest()}'
+
+
+def load_cached_frame(name: str, sources: List[Union[str, Path]],
+                      compute: Callable[[], pd.DataFrame], versions: Sequence[str] = ()) -> pd.DataFrame:
+    """Loads a derived data frame from the cache, computing and storing it on a miss.
+
+    Parameters
+    ----------
+    name
+        A name for the intermediate that is unique to the computation.
+    sources
+        The files the intermediate is derived from.
+    compute
+        Function producing the intermediate from the source files.
+    versions
+        Versions of anything else the intermediate depends on, such as
+        the packages it is fetched through.
+
+    Returns
+    -------
+        A copy of the cached intermediate, safe for the caller to modify.
+
+    """
+    key = get_cache_key(name, sources, versions)
+    with _MEMORY_LOCK:
+        data = _MEMORY_CACHE.get(key)
+        if data is not None:
+            _MEMORY_CACHE.move_to_end(key)
+    if data is None:
+        cache_path = _CACHE_DIR / f'{key}.hdf' if _CACHE_DIR is not None else None
+        if cache_path is not None and cache_path.exists():
+            logger.debug(f'Reading cached {name} from {str(cache_path)}.')
+            data = _read_cache_file(cache_path)
+        if data is None:
+            logger.debug(f'No cached {name} found. Computing from {[str(s) for s in sources]}.')
+            data = compute()
+            if cache_path is not None:
+                logger.debug(f'Writing cached {name} to {str(cache_path)}.')
+                _write_cache_file(data, cache_path)
+        with _MEMORY_LOCK:
+            _MEMORY_CACHE[key] = data
+            while len(_MEMORY_CACHE) > metadata.MAKE_ARTIFACT_MEMORY_CACHE_SIZE:
+                _MEMORY_CACHE.popitem(last=False)
+    return data.copy()
+
+
+def _read_cache_file(cache_path: Path) -> Optional[pd.DataFrame]:
+    try:
+        with _DISK_LOCK:
+            return pd.read_hdf(cache_path, key='data')
+    # A truncated or corrupt HDF file raises one of several errors depending
+    # on where it was cut off.  HDF5ExtError is a RuntimeError.
+    except (OSError, KeyError, ValueError, RuntimeError) as e:
+        logger.debug(f'Unable to read cache entry {str(cache_path)}: {e}.  Treating it as a miss.')
+        try:
+            cache_path.unlink()
+        except OSError:
+            pass
+        return None
+
+
+def _write_cache_file(data: pd.DataFrame, cache_path: Path):
+    # Write to a temporary file and move it into place so an interrupted
+    # write never leaves a truncated entry under the real name, even when
+    # several processes share the cache directory.
+    with tempfile.NamedTemporaryFile(dir=str(cache_path.parent), prefix=f'{cache_path.stem}_',
+                                     suffix='.tmp', delete=False) as f:
+        temp_path = Path(f.name)
+    try:
+        with _DISK_LOCK:
+            data.to_hdf(temp_path, key='data', format='fixed')
+        os.replace(str(temp_path), str(cache_path))
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
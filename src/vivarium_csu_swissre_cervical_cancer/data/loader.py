@@ -12,18 +12,26 @@ for an example.
 
    No logging is done here. Logging is done in vivarium inputs itself and forwarded.
 """
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, reduce
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import hashlib
+import inspect
 import itertools
 
+import gbd_mapping
 import numpy as np
 import pandas as pd
 from gbd_mapping import causes, risk_factors, covariates
 from vivarium.framework.artifact import EntityKey
 from vivarium_gbd_access import gbd
+import vivarium_inputs
 from vivarium_inputs import interface, utilities as vi_utils, utility_data, globals as vi_globals
 from vivarium_inputs.mapping_extension import alternative_risk_factors
 
 from vivarium_csu_swissre_cervical_cancer import paths, data_keys, data_values, utilities, metadata
+from vivarium_csu_swissre_cervical_cancer.data import cache
 
 ARTIFACT_INDEX_COLUMNS = [
     'location',
@@ -38,7 +46,7 @@ ARTIFACT_INDEX_COLUMNS = [
 BCC_DURATION = 14.5
 
 
-def get_data(lookup_key: str, location: str) -> pd.DataFrame:
+def get_data(lookup_key: str, location: str, draws: Iterable[int] = None) -> pd.DataFrame:
     """Retrieves data from an appropriate source.
 
     Parameters
@@ -48,6 +56,8 @@ def get_data(lookup_key: str, location: str) -> pd.DataFrame:
         the requested data.
     location
         The location to get data for.
+    draws
+        The input draws to produce data for. Defaults to all draws.
 
     Returns
     -------
@@ -72,12 +82,150 @@ def get_data(lookup_key: str, location: str) -> pd.DataFrame:
         data_keys.CERVICAL_CANCER.DISABILITY_WEIGHT: load_disability_weight,
         data_keys.CERVICAL_CANCER.EMR: load_emr,
         data_keys.CERVICAL_CANCER.CSMR: load_csmr,
+        data_keys.CERVICAL_CANCER.RAW_ICC_PREVALENCE: load_cervical_cancer_prevalence,
         data_keys.CERVICAL_CANCER.RESTRICTIONS: load_metadata
     }
-    return mapping[lookup_key](lookup_key, location)
+    draws = tuple(range(metadata.DRAW_COUNT)) if draws is None else tuple(draws)
+    return mapping[lookup_key](lookup_key, location, draws)
 
 
-def load_population_structure(key: str, location: str) -> pd.DataFrame:
+def get_province_data(lookup_key: str, location: str, draws: Iterable[int] = None) -> pd.DataFrame:
+    """Retrieves data for each province covered by location separately.
+
+    Parameters
+    ----------
+    lookup_key
+        The key that will eventually get put in the artifact with
+        the requested data.
+    location
+        The location to get data for.
+    draws
+        The input draws to produce data for. Defaults to all draws.
+
+    Returns
+    -------
+        The requested data for every province, stacked on a ``province``
+        index level following ``location``.
+
+    """
+    shards = []
+    for province in data_keys.SWISSRE_LOCATION_WEIGHTS:
+        data = get_data(lookup_key, province, draws)
+        index_columns = list(data.index.names)
+        data = data.reset_index()
+        data['location'] = location
+        data.insert(index_columns.index('location') + 1, 'province', province)
+        shards.append(data)
+    index_columns.insert(index_columns.index('location') + 1, 'province')
+    return pd.concat(shards, ignore_index=True).set_index(index_columns)
+
+
+def get_location_weights(location: str) -> Dict[str, float]:
+    """Returns the province weights that make up location.
+
+    A single province may be requested as a location in its own right, in
+    which case it is its only province.
+    """
+    if location in data_keys.SWISSRE_LOCATION_WEIGHTS:
+        return {location: data_keys.SWISSRE_LOCATION_WEIGHTS[location]}
+    return data_keys.SWISSRE_LOCATION_WEIGHTS
+
+
+def get_raw_data_inputs(lookup_key: str) -> List[Path]:
+    """Returns the raw forecast files the data for a key is derived from.
+
+    Keys that share raw files can run concurrently once those files have
+    been parsed with :func:`prepare_raw_data`.
+
+    Parameters
+    ----------
+    lookup_key
+        The key that will eventually get put in the artifact with
+        the requested data.
+
+    Returns
+    -------
+        The paths of the raw forecast files the key depends on.
+
+    """
+    mapping = {
+        data_keys.POPULATION.ACMR: [paths.RAW_ACMR_DATA_PATH],
+        data_keys.CERVICAL_CANCER.BCC_PREVALENCE: [paths.RAW_INCIDENCE_RATE_DATA_PATH],
+        data_keys.CERVICAL_CANCER.BCC_PREVALENCE_WITH_HRHPV: [paths.RAW_INCIDENCE_RATE_DATA_PATH],
+        data_keys.CERVICAL_CANCER.PREVALENCE: [paths.RAW_PREVALENCE_DATA_PATH],
+        data_keys.CERVICAL_CANCER.PREVALENCE_WITH_HRHPV: [paths.RAW_PREVALENCE_DATA_PATH],
+        data_keys.CERVICAL_CANCER.BCC_HPV_POS_INCIDENCE_RATE: [paths.RAW_INCIDENCE_RATE_DATA_PATH],
+        data_keys.CERVICAL_CANCER.BCC_HPV_NEG_INCIDENCE_RATE: [paths.RAW_INCIDENCE_RATE_DATA_PATH],
+        data_keys.CERVICAL_CANCER.EMR: [paths.RAW_MORTALITY_DATA_PATH, paths.RAW_PREVALENCE_DATA_PATH],
+        data_keys.CERVICAL_CANCER.CSMR: [paths.RAW_MORTALITY_DATA_PATH],
+        data_keys.CERVICAL_CANCER.RAW_ICC_PREVALENCE: [paths.RAW_PREVALENCE_DATA_PATH],
+    }
+    return mapping.get(lookup_key, [])
+
+
+def prepare_raw_data(data_path: Path):
+    """Parses a raw forecast file into the intermediate cache."""
+    _transform_raw_data_preliminary(data_path)
+
+
+def get_provenance_inputs(lookup_key: str) -> Tuple[List[Path], Dict[str, Any]]:
+    """Returns every input the data for a key is derived from, other than the code itself.
+
+    Parameters
+    ----------
+    lookup_key
+        The key that will eventually get put in the artifact with
+        the requested data.
+
+    Returns
+    -------
+        The source files the key is read from and the project constants
+        used to compute it, by name.
+
+    """
+    hrhpv_adjusted_keys = [
+        data_keys.CERVICAL_CANCER.BCC_PREVALENCE,
+        data_keys.CERVICAL_CANCER.BCC_PREVALENCE_WITH_HRHPV,
+        data_keys.CERVICAL_CANCER.PREVALENCE,
+        data_keys.CERVICAL_CANCER.PREVALENCE_WITH_HRHPV,
+        data_keys.CERVICAL_CANCER.BCC_HPV_POS_INCIDENCE_RATE,
+        data_keys.CERVICAL_CANCER.BCC_HPV_NEG_INCIDENCE_RATE,
+    ]
+    bcc_keys = [
+        data_keys.CERVICAL_CANCER.BCC_PREVALENCE,
+        data_keys.CERVICAL_CANCER.BCC_PREVALENCE_WITH_HRHPV,
+        data_keys.CERVICAL_CANCER.BCC_HPV_POS_INCIDENCE_RATE,
+        data_keys.CERVICAL_CANCER.BCC_HPV_NEG_INCIDENCE_RATE,
+    ]
+    hrhpv_raw_paths = {
+        data_keys.CERVICAL_CANCER.HRHPV_PREVALENCE: paths.HRHPV_PREVALENCE_PATH,
+        data_keys.CERVICAL_CANCER.HRHPV_INCIDENCE_RATE: paths.HRHPV_INCIDENCE_PATH,
+        data_keys.CERVICAL_CANCER.HRHPV_REMISSION_RATE: paths.HRHPV_REMISSION_PATH,
+    }
+
+    source_files = list(get_raw_data_inputs(lookup_key))
+    constants = {}
+    if source_files:
+        constants['YOUNGEST_SIMULANT_AGE'] = data_values.YOUNGEST_SIMULANT_AGE
+    if source_files or lookup_key == data_keys.CERVICAL_CANCER.DISABILITY_WEIGHT:
+        constants['SWISSRE_LOCATION_WEIGHTS'] = data_keys.SWISSRE_LOCATION_WEIGHTS
+    if lookup_key == data_keys.CERVICAL_CANCER.DISABILITY_WEIGHT:
+        constants['GBD_SOURCE_VERSIONS'] = get_gbd_source_versions()
+    if lookup_key in hrhpv_raw_paths:
+        source_files.append(hrhpv_raw_paths[lookup_key])
+    if lookup_key in hrhpv_adjusted_keys:
+        source_files.append(paths.HRHPV_PREVALENCE_PATH)
+        constants['RR_HRHPV_PARAMS'] = data_values.RR_HRHPV_PARAMS
+    if lookup_key in bcc_keys:
+        constants['BCC_MEAN_SOJOURN_TIME'] = data_values.BCC_MEAN_SOJOURN_TIME
+    return source_files, constants
+
+
+def get_draw_columns(draws: Iterable[int]) -> List[str]:
+    return [f'draw_{draw}' for draw in draws]
+
+
+def load_population_structure(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     def get_row(sex, year):
         return {
             'location': location,
@@ -97,11 +245,11 @@ def load_population_structure(key: str, location: str) -> pd.DataFrame:
     ]).set_index(['location', 'sex', 'age_start', 'age_end', 'year_start', 'year_end'])
 
 
-def load_age_bins(key: str, location: str) -> pd.DataFrame:
+def load_age_bins(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     return interface.get_age_bins()
 
 
-def load_demographic_dimensions(key: str, location: str) -> pd.DataFrame:
+def load_demographic_dimensions(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     return pd.DataFrame([
         {
             'location': location,
@@ -114,17 +262,18 @@ def load_demographic_dimensions(key: str, location: str) -> pd.DataFrame:
     ]).set_index(['location', 'sex', 'age_start', 'age_end', 'year_start', 'year_end'])
 
 
-def load_theoretical_minimum_risk_life_expectancy(key: str, location: str) -> pd.DataFrame:
+def load_theoretical_minimum_risk_life_expectancy(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     return interface.get_theoretical_minimum_risk_life_expectancy()
 
 
-def load_standard_data(key: str, location: str) -> pd.DataFrame:
+def load_standard_data(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     key = EntityKey(key)
     entity = get_entity(key)
-    return interface.get_measure(entity, key.measure, location)
+    data = interface.get_measure(entity, key.measure, location)
+    return data[get_draw_columns(draws)]
 
 
-def load_metadata(key: str, location: str):
+def load_metadata(key: str, location: str, draws: Tuple[int, ...]):
     key = EntityKey(key)
     entity = get_entity(key)
     md = entity[key.measure]
@@ -133,32 +282,32 @@ def load_metadata(key: str, location: str):
     return md
 
 
-def load_acmr(key: str, location: str) -> pd.DataFrame:
-    return _transform_raw_data(location, paths.RAW_ACMR_DATA_PATH, True)
+def load_acmr(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
+    return _transform_raw_data(location, paths.RAW_ACMR_DATA_PATH, True, draws)
 
 
-def load_hpv_prevalence(key: str, location: str) -> pd.DataFrame:
+def load_hpv_prevalence(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     """Computes hpv prevalence values for key at location."""
     if key == data_keys.CERVICAL_CANCER.HRHPV_PREVALENCE:
-        return _load_hrhpv_raw(paths.HRHPV_PREVALENCE_PATH)
+        return _load_hrhpv_raw(paths.HRHPV_PREVALENCE_PATH, draws)
     else:
         raise ValueError(f'Unrecognized key {key}')
 
 
-def load_cervical_cancer_prevalence(key: str, location: str) -> pd.DataFrame:
+def load_cervical_cancer_prevalence(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     """Computes cervical cancer prevalence values for key at location."""
     if key in [data_keys.CERVICAL_CANCER.BCC_PREVALENCE,
                data_keys.CERVICAL_CANCER.BCC_PREVALENCE_WITH_HRHPV,
                data_keys.CERVICAL_CANCER.RAW_BCC_PREVALENCE]:
         # base bcc prevalence is incidence_c432 times mean sojourn time
-        raw_incidence_rate = _transform_raw_data(location, paths.RAW_INCIDENCE_RATE_DATA_PATH, False)
+        raw_incidence_rate = _transform_raw_data(location, paths.RAW_INCIDENCE_RATE_DATA_PATH, False, draws)
         cervical_cancer_incidence_rate = _expand_age_bins(raw_incidence_rate)
         base_prevalence = cervical_cancer_incidence_rate * data_values.BCC_MEAN_SOJOURN_TIME
     elif key in [data_keys.CERVICAL_CANCER.PREVALENCE,
                  data_keys.CERVICAL_CANCER.PREVALENCE_WITH_HRHPV,
                  data_keys.CERVICAL_CANCER.RAW_ICC_PREVALENCE]:
         # base icc prevalence is prevalence directly from forecast data source
-        raw_base_prevalence = _transform_raw_data(location, paths.RAW_PREVALENCE_DATA_PATH, False)
+        raw_base_prevalence = _transform_raw_data(location, paths.RAW_PREVALENCE_DATA_PATH, False, draws)
         base_prevalence = _expand_age_bins(raw_base_prevalence)
     else:
         raise ValueError(f'Unrecognized key {key}')
@@ -167,9 +316,7 @@ def load_cervical_cancer_prevalence(key: str, location: str) -> pd.DataFrame:
         prevalence = base_prevalence
     else:
         # Get RR and PAF due to HRHPV
-        hrhpv_prevalence = load_hpv_prevalence(data_keys.CERVICAL_CANCER.HRHPV_PREVALENCE, location)
-        hrhpv_rr = load_rr_hrhpv(hrhpv_prevalence.columns)
-        paf = load_paf(hrhpv_prevalence, hrhpv_rr)
+        hrhpv_rr, paf = load_hrhpv_rr_and_paf(location, draws)
 
         if key in [data_keys.CERVICAL_CANCER.BCC_PREVALENCE, data_keys.CERVICAL_CANCER.PREVALENCE]:
             # Prev(CC, S_hrHPV) = prev * {1 - PAF * [RR / (RR-1)])}
@@ -183,15 +330,34 @@ def load_cervical_cancer_prevalence(key: str, location: str) -> pd.DataFrame:
 
 def load_rr_hrhpv(columns) -> pd.Series:
     """Get random variables based on distribution for RR hrHPV, columns should be those in the prevalence df"""
-    per_draw_rr = pd.Series(
-        [utilities.get_lognormal_random_variable(*data_values.RR_HRHPV_PARAMS, x) for x in range(0, 1000)],
-        index=columns)
+    draws = [int(column.split('_')[-1]) for column in columns]
+    per_draw_rr = pd.Series(utilities.get_lognormal_random_variables(*data_values.RR_HRHPV_PARAMS, draws),
+                            index=columns)
     return per_draw_rr
 
 
-def load_hrhpv_remission(key: str, location: str) -> pd.DataFrame:
+def load_hrhpv_rr_and_paf(location: str, draws: Tuple[int, ...]) -> Tuple[pd.Series, pd.DataFrame]:
+    """Computes the hrHPV relative risk and PAF once per location.
+
+    Every cervical cancer prevalence and bcc incidence key is adjusted by
+    these, so they are shared across keys for the life of the build. Each
+    caller gets its own copy.
+    """
+    hrhpv_rr, paf = _load_hrhpv_rr_and_paf(location, draws)
+    return hrhpv_rr.copy(), paf.copy()
+
+
+@lru_cache(maxsize=metadata.MAKE_ARTIFACT_MEMORY_CACHE_SIZE)
+def _load_hrhpv_rr_and_paf(location: str, draws: Tuple[int, ...]) -> Tuple[pd.Series, pd.DataFrame]:
+    hrhpv_prevalence = load_hpv_prevalence(data_keys.CERVICAL_CANCER.HRHPV_PREVALENCE, location, draws)
+    hrhpv_rr = load_rr_hrhpv(hrhpv_prevalence.columns)
+    paf = load_paf(hrhpv_prevalence, hrhpv_rr)
+    return hrhpv_rr, paf
+
+
+def load_hrhpv_remission(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     if key == data_keys.CERVICAL_CANCER.HRHPV_REMISSION_RATE:
-        return _load_hrhpv_raw(paths.HRHPV_REMISSION_PATH)
+        return _load_hrhpv_raw(paths.HRHPV_REMISSION_PATH, draws)
     else:
         raise ValueError(f'Unrecognized key {key}')
 
@@ -204,18 +370,18 @@ def load_paf(prev, rr) -> pd.DataFrame:
     return num / (num + 1)
 
 
-def load_hpv_incidence_rate(key: str, location: str) -> pd.DataFrame:
+def load_hpv_incidence_rate(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     """Computes hpv prevalence values for key at location."""
     if key == data_keys.CERVICAL_CANCER.HRHPV_INCIDENCE_RATE:
-        return _load_hrhpv_raw(paths.HRHPV_INCIDENCE_PATH)
+        return _load_hrhpv_raw(paths.HRHPV_INCIDENCE_PATH, draws)
     else:
         raise ValueError(f'Unrecognized key {key}')
 
 
-def load_bcc_incidence_rate(key: str, location: str) -> pd.DataFrame:
+def load_bcc_incidence_rate(key: str, location: str, draws: Tuple[int, ...]) -> pd.DataFrame:
     """Get the bcc incidence rate given a key."""
 
-    raw_bcc_incidence_rate = _transform_raw_data(location, paths.RAW_INCIDENCE_RATE_DATA_PATH, False)
+    raw_bcc_incidence_rate = _transform_raw_data(location, paths.RAW_INCIDENCE_RATE_DATA_PATH, False, draws)
     cervical_cancer_incidence_rate = _expand_age_bins(raw_bcc_incidence_rate)
     base_bcc_incidence_rate = shift_incidence_rate(cervical_cancer_incidence_rate, data_values.BCC_MEAN_SOJOURN_TIME)
 
@@ -223,9 +389,7 @@ def load_bcc_incidence_rate(key: str, location: str) -> pd.DataFrame:
         incidence_rate = base_bcc_incidence_rate
     else:
         # Get RR and PAF due to HRHPV
-        hrhpv_prevalence = load_hpv_prevalence(data_keys.CERVICAL_CANCER.HRHPV_PREVALENCE, location)
-        hrhpv_rr = load_rr_hrhpv(hrhpv_prevalence.columns)
-        paf = load_paf(hrhpv_prevalence, hrhpv_rr)
+        hrhpv_rr, paf = load_hrhpv_rr_and_paf(location, draws)
 
         if key == data_keys.CERVICAL_CANCER.BCC_HPV_POS_INCIDENCE_RATE:
             incidence_rate = base_bcc_incidence_rate * (1 - paf) * hrhpv_rr
@@ -238,70 +402,129 @@ def load_bcc_incidence_rate(key: str, location: str) -> pd.DataFrame:
 
 
 def shift_incidence_rate(incidence_rate: pd.DataFrame, shift: int) -> pd.DataFrame:
+    draw_columns = [c for c in incidence_rate.columns if c.startswith('draw_')]
     incidence_rate = incidence_rate.reset_index()
     incidence_rate['age_start'] = incidence_rate['age_start'] - shift
     incidence_rate = incidence_rate.loc[incidence_rate['age_start'] >= 15, :]
-    incidence_rate['age_end'] = incidence_rate['age_end'].apply(lambda x: x - shift if x != 125 else 100 - shift)
-
-    df = pd.DataFrame([{'age_start': age * 1.0, 'year_start': year} for (age, year) in
-                       itertools.product(range(100 - shift, 100), range(1990, 2041))])
-    df['location'] = 'SwissRE Coverage'
-    df['sex'] = 'Female'
-    df['age_end'] = df['age_start'].apply(lambda x: x + 1 if x != 99 else 125)
-    df['year_end'] = df['year_start'] + 1
-
-    draws = df.apply(lambda row: incidence_rate.loc[
-        (incidence_rate['age_start'] == (99.0 - shift)) & (incidence_rate['year_start'] == row['year_start']),
-        [f'draw_{i}' for i in range(0, 1000)]].values[0], axis=1)
-    draws = pd.concat([pd.Series([row[i] for row in draws], name=f'draw_{i}') for i in range(0, 1000)], axis=1)
+    incidence_rate['age_end'] = np.where(incidence_rate['age_end'] != 125, incidence_rate['age_end'] - shift,
+                                         100 - shift)
+
+    # The shifted-out upper ages all take the rate of the oldest remaining age for their year.
+    tail_ages = np.arange(100 - shift, 100, dtype=float)
+    years = np.arange(1990, 2041)
+    df = pd.DataFrame({
+        'location': 'SwissRE Coverage',
+        'sex': 'Female',
+        'age_start': np.repeat(tail_ages, len(years)),
+        'age_end': np.repeat(np.where(tail_ages != 99, tail_ages + 1, 125), len(years)),
+        'year_start': np.tile(years, len(tail_ages)),
+        'year_end': np.tile(years + 1, len(tail_ages)),
+    }, columns=ARTIFACT_INDEX_COLUMNS)
+
+    oldest_age_draws = (incidence_rate
+                        .loc[incidence_rate['age_start'] == (99.0 - shift)]
+                        .drop_duplicates('year_start')
+                        .set_index('year_start')
+                        .reindex(years)[draw_columns]
+                        .values)
+    draws = pd.DataFrame(np.tile(oldest_age_draws, (len(tail_ages), 1)), columns=draw_columns)
     df = pd.concat([df, draws], axis=1)
-    df = df.set_index(ARTIFACT_INDEX_COLUMNS).reset_index()
 
     incidence_rate = pd.concat([incidence_rate, df]).set_index(ARTIFACT_INDEX_COLUMNS)
     return incidence_rate
 
 
-def load_disability_weight(key: str, location: str):
+def load_disability_weight(key: str, location: str, draws: Tuple[int, ...], measure_source: Callable = None):
     """Loads disability weights, weighting by subnational location for
-    invasive cervical cancer"""
+    invasive cervical cancer.
+
+    ``measure_source`` has the signature of
+    :func:`vivarium_inputs.interface.get_measure` and defaults to it. Any
+    stand-in with that signature can be supplied instead, in which case
+    nothing is cached.
+    """
     if key == data_keys.CERVICAL_CANCER.DISABILITY_WEIGHT:
-        location_weighted_disability_weight = 0
-        for swissre_location, location_weight in data_keys.SWISSRE_LOCATION_WEIGHTS.items():
-            prevalence_disability_weight = 0
-            total_sequela_prevalence = 0
-            for sequela in causes.cervical_cancer.sequelae:
-                # Get prevalence and disability weight for location and sequela
-                prevalence = interface.get_measure(sequela, 'prevalence', swissre_location)
-                prevalence = prevalence.reset_index()
-                prevalence["location"] = metadata.LOCATIONS[0]
-                prevalence = prevalence.set_index(ARTIFACT_INDEX_COLUMNS)
-                disability_weight = interface.get_measure(sequela, 'disability_weight', swissre_location)
-                disability_weight = disability_weight.reset_index()
-                disability_weight["location"] = metadata.LOCATIONS[0]
-                disability_weight = disability_weight.set_index(ARTIFACT_INDEX_COLUMNS)
-                # Apply prevalence weight
-                prevalence_disability_weight += prevalence * disability_weight
-                total_sequela_prevalence += prevalence
-
-            # Calculate disability weight and apply location weight
-            disability_weight = prevalence_disability_weight / total_sequela_prevalence
-            disability_weight = disability_weight.fillna(0)  # handle NaNs from dividing by 0 prevalence
-            location_weighted_disability_weight += disability_weight * location_weight
-        disability_weight = location_weighted_disability_weight / sum(data_keys.SWISSRE_LOCATION_WEIGHTS.values())
-        return disability_weight
+        province_weights = get_location_weights(location)
+        provinces = list(province_weights)
+        sequelae = list(causes.cervical_cancer.sequelae)
+        measures = get_sequela_measures(sequelae, ['prevalence', 'disability_weight'], provinces, measure_source)
+
+        # Stack everything into (province, sequela, demographic row, draw) arrays on the union of every
+        # index, so rows missing from some frames come through as NaN rather than being dropped.
+        index = reduce(lambda left, right: left.union(right), [data.index for data in measures.values()])
+        columns = get_draw_columns(draws)
+
+        def stack(measure):
+            return np.stack([np.stack([measures[(sequela.name, measure, province)].reindex(index)[columns].values
+                                       for sequela in sequelae])
+                             for province in provinces])
+
+        prevalence, disability_weight = stack('prevalence'), stack('disability_weight')
+
+        # Prevalence weight sequelae within each province.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            province_disability_weight = (prevalence * disability_weight).sum(axis=1) / prevalence.sum(axis=1)
+        # Rows of a province with 0 total prevalence or missing a sequela get a 0 weight.  Rows the province
+        # has no data for at all stay missing.
+        in_province = np.stack([index.isin(reduce(lambda left, right: left.union(right),
+                                                  [data.index for (_, _, p), data in measures.items()
+                                                   if p == province]))
+                                for province in provinces])
+        province_disability_weight[np.isnan(province_disability_weight) & in_province[:, :, np.newaxis]] = 0
+        # Then weight provinces.
+        location_weights = np.array([province_weights[province] for province in provinces])
+        values = np.tensordot(location_weights, province_disability_weight, axes=1) / location_weights.sum()
+        return pd.DataFrame(values, index=index, columns=columns)
     else:
         raise ValueError(f'Unrecognized key {key}')
 
 
-def load_emr(key: str, location: str):
+def get_gbd_source_versions() -> List[str]:
+    """Returns the versions of the packages GBD data is pulled and mapped through."""
+    return [f'vivarium_inputs=={vivarium_inputs.__version__}', f'gbd_mapping=={gbd_mapping.__version__}']
+
+
+def get_sequela_measures(sequelae: List, measures: List[str], locations: List[str],
+                         measure_source: Callable = None) -> Dict[Tuple[str, str, str], pd.DataFrame]:
+    """Fetches every (sequela, measure, location) combination concurrently.
+
+    The fetches are independent and I/O bound, so they run in a bounded
+    thread pool. Data from :func:`vivarium_inputs.interface.get_measure`,
+    the default ``measure_source``, is cached so rebuilds don't fetch
+    again. The cache is keyed on the versions of the packages the data
+    comes through, so upgrading either of them fetches fresh data. Data
+    from any other source is never cached. Returned data is relabeled to
+    the project location.
+    """
+    is_default_source = measure_source is None
+    measure_source = interface.get_measure if is_default_source else measure_source
+
+    def fetch(sequela, measure, location):
+        def compute():
+            data = measure_source(sequela, measure, location).reset_index()
+            data['location'] = metadata.LOCATIONS[0]
+            return data.set_index(ARTIFACT_INDEX_COLUMNS)
+        if not is_default_source:
+            return compute()
+        name = f'{sequela.name}_{measure}_{utilities.sanitize_location(location)}'
+        return cache.load_cached_frame(name, [], compute, versions=get_gbd_source_versions())
+
+    requests = list(itertools.product(sequelae, measures, locations))
+    with ThreadPoolExecutor(max_workers=metadata.MAKE_ARTIFACT_FETCH_THREADS) as executor:
+        futures = {(sequela.name, measure, location): executor.submit(fetch, sequela, measure, location)
+                   for sequela, measure, location in requests}
+        return {request: future.result() for request, future in futures.items()}
+
+
+def load_emr(key: str, location: str, draws: Tuple[int, ...]):
     return (
-            load_csmr(data_keys.CERVICAL_CANCER.CSMR, location)
-            / _expand_age_bins(_transform_raw_data(location, paths.RAW_PREVALENCE_DATA_PATH, False))
+            load_csmr(data_keys.CERVICAL_CANCER.CSMR, location, draws)
+            / _expand_age_bins(_transform_raw_data(location, paths.RAW_PREVALENCE_DATA_PATH, False, draws))
     )
 
 
-def load_csmr(key: str, location: str):
-    return _expand_age_bins(_transform_raw_data(location, paths.RAW_MORTALITY_DATA_PATH, False))
+def load_csmr(key: str, location: str, draws: Tuple[int, ...]):
+    return _expand_age_bins(_transform_raw_data(location, paths.RAW_MORTALITY_DATA_PATH, False, draws))
 
 
 def _load_em_from_meid(location, meid, measure):
@@ -318,97 +541,122 @@ def _load_em_from_meid(location, meid, measure):
 
 
 # project-specific data functions
-def _transform_raw_data(location: str, data_path: Path, is_log_data: bool) -> pd.DataFrame:
+def _transform_raw_data(location: str, data_path: Path, is_log_data: bool, draws: Tuple[int, ...]) -> pd.DataFrame:
+    province_weights = get_location_weights(location)
+    provinces = list(province_weights)
     processed_data = _transform_raw_data_preliminary(data_path, is_log_data)
-    processed_data['location'] = location
-
-    # Weight the covered provinces
-    processed_data['value'] = (sum(processed_data[province] * weight for province, weight
-                                   in data_keys.SWISSRE_LOCATION_WEIGHTS.items())
-                               / sum(data_keys.SWISSRE_LOCATION_WEIGHTS.values()))
-
-    processed_data = (
-        processed_data
-            # Remove province columns
-            .drop([province for province in data_keys.SWISSRE_LOCATION_WEIGHTS.keys()], axis=1)
-            # Set index to final columns and unstack with draws as columns
-            .reset_index()
-            .set_index(ARTIFACT_INDEX_COLUMNS + ["draw"])
-            .unstack()
-    )
+    processed_data = processed_data[processed_data['draw'].isin(draws) & processed_data['location'].isin(provinces)]
+
+    # Parsed data is sorted by demographic row, so a row starts wherever the demographic columns change.
+    demographic_columns = ARTIFACT_INDEX_COLUMNS[1:]
+    demography = processed_data[demographic_columns]
+    is_new_row = (demography != demography.shift()).any(axis=1).values
+    row_codes = np.cumsum(is_new_row) - 1
+    province_codes = pd.Categorical(processed_data['location'], categories=provinces).codes
+    draw_values = np.unique(processed_data['draw'].values)
+    draw_codes = np.searchsorted(draw_values, processed_data['draw'].values)
 
-    # Simplify column index and rename draw columns
-    processed_data.columns = [c[1] for c in processed_data.columns]
-    processed_data = processed_data.rename(columns={col: f'draw_{col}' for col in processed_data.columns})
-    return processed_data
+    # Scatter into a (demographic row, province, draw) array, leaving missing cells NaN, and weight the provinces.
+    values = np.full((is_new_row.sum(), len(provinces), len(draw_values)), np.nan)
+    values[row_codes, province_codes, draw_codes] = processed_data['noised_forecast'].values
+    location_weights = np.array([province_weights[province] for province in provinces])
+    values = np.tensordot(values, location_weights, axes=([1], [0])) / location_weights.sum()
+
+    index = demography[is_new_row].reset_index(drop=True)
+    # A province is labeled with the project location it is part of, so it lines up with non-province data.
+    index.insert(0, 'location', metadata.LOCATIONS[0] if location in data_keys.SWISSRE_LOCATION_WEIGHTS else location)
+    return pd.DataFrame(values, index=pd.MultiIndex.from_frame(index), columns=get_draw_columns(draw_values))
 
 
 def _transform_raw_data_preliminary(data_path: Path, is_log_data: bool = False) -> pd.DataFrame:
-    """Transforms data to a form with draws in the index and raw locations as columns"""
-    raw_data: pd.DataFrame = pd.read_csv(data_path)
-    age_bins = gbd.get_age_bins().set_index('age_group_name')
-
-    processed_data = raw_data[raw_data['location_id'].isin(data_keys.SWISSRE_LOCATION_WEIGHTS)]
-    processed_data = (
-        processed_data
-        .set_index('age_group_id')
-        .join(age_bins, how='left')
-        .reset_index()
-        .rename(columns={
-            'age_group_years_start': 'age_start',
-            'age_group_years_end': 'age_end',
-            'year_id': 'year_start',
-            'sex_id': 'sex',
-            'location_id': 'location',
-        })
-    )
+    """Transforms data to a long form sorted by demographic row, province and draw"""
+    return cache.load_cached_frame(f'{Path(data_path).stem}_parsed', [data_path],
+                                   lambda: _parse_raw_data(data_path), versions=_get_parse_versions())
+
+
+def _get_parse_versions() -> List[str]:
+    """Returns everything other than the raw file that parsed raw data depends on."""
+    parser = hashlib.sha1(inspect.getsource(_parse_raw_data).encode()).hexdigest()
+    return [f'provinces={list(data_keys.SWISSRE_LOCATION_WEIGHTS)!r}',
+            f'YOUNGEST_SIMULANT_AGE={data_values.YOUNGEST_SIMULANT_AGE!r}',
+            f'ARTIFACT_INDEX_COLUMNS={ARTIFACT_INDEX_COLUMNS!r}',
+            f'parser={parser}']
 
-    processed_data = processed_data[(processed_data['age_start'] >= data_values.YOUNGEST_SIMULANT_AGE)
-                                    & (processed_data['age_end'] >= data_values.YOUNGEST_SIMULANT_AGE)]
+
+def _parse_raw_data(data_path: Path) -> pd.DataFrame:
+    """Parses a raw forecast file into a long form sorted by demographic row, province and draw.
+
+    The file is streamed in chunks. Only the needed columns are read, with
+    compact dtypes, and rows outside the covered provinces and simulated ages
+    are dropped from each chunk, so peak memory is bounded by the filtered
+    data rather than the size of the file.
+    """
+    age_bins = _get_age_bins()
+    dtypes = {
+        'location_id': pd.api.types.CategoricalDtype(list(data_keys.SWISSRE_LOCATION_WEIGHTS)),
+        'age_group_id': 'category',
+        'sex_id': 'category',
+        'year_id': 'int16',
+        'draw': 'int16',
+        'noised_forecast': 'float64',
+    }
+
+    chunks = []
+    for chunk in pd.read_csv(data_path, usecols=list(dtypes), dtype=dtypes,
+                             chunksize=metadata.MAKE_ARTIFACT_CSV_CHUNK_SIZE):
+        # Locations outside the province categories are read as missing.
+        chunk = chunk[chunk['location_id'].notna()]
+        age_start = age_bins['age_group_years_start'].reindex(chunk['age_group_id'].astype(str)).values
+        age_end = age_bins['age_group_years_end'].reindex(chunk['age_group_id'].astype(str)).values
+        in_age_range = (age_start >= data_values.YOUNGEST_SIMULANT_AGE) & (age_end >= data_values.YOUNGEST_SIMULANT_AGE)
+        chunks.append(chunk[in_age_range].assign(age_start=age_start[in_age_range], age_end=age_end[in_age_range]))
+
+    processed_data = pd.concat(chunks, ignore_index=True).rename(columns={
+        'year_id': 'year_start',
+        'sex_id': 'sex',
+        'location_id': 'location',
+    })
+    processed_data = processed_data.astype({'location': str, 'sex': str, 'year_start': 'int64', 'draw': 'int64'})
 
     # Add year end column
     processed_data['year_end'] = processed_data['year_start'] + 1
 
-    # Drop unneeded columns
+    # Drop unneeded columns and sort by demographic row, then province and draw
     processed_data = processed_data[ARTIFACT_INDEX_COLUMNS + ['draw', 'noised_forecast']]
+    return processed_data.sort_values(ARTIFACT_INDEX_COLUMNS[1:] + ['location', 'draw']).reset_index(drop=True)
 
-    # Make draw column numeric
-    processed_data['draw'] = pd.to_numeric(processed_data['draw'])
 
-    # Set index and unstack data with locations as columns
-    processed_data = (
-        processed_data
-            .set_index(ARTIFACT_INDEX_COLUMNS + ["draw"])
-            .unstack(level=0)
-    )
+def _get_age_bins() -> pd.DataFrame:
+    return _load_age_bins().copy()
+
 
-    # Simplify column index and add back location column
-    processed_data.columns = [c[1] for c in processed_data.columns]
-    return processed_data
+@lru_cache(maxsize=1)
+def _load_age_bins() -> pd.DataFrame:
+    return gbd.get_age_bins().set_index('age_group_name')
 
 
 def _expand_age_bins(df: pd.DataFrame, index_col=ARTIFACT_INDEX_COLUMNS, prev_age_bin_sz=5) -> pd.DataFrame:
     """Expands granularity of age bin to 1-year age bins from prev_age_bin_sz-sized age bins."""
     df = df.reset_index()
-    final_df = pd.DataFrame(columns=df.columns)
-    for i in range(0, prev_age_bin_sz):
-        tmp = df.copy()
-        tmp["age_start"] = tmp["age_start"] + i
-        tmp["age_end"] = tmp["age_start"] + 1
-        final_df = final_df.append(tmp)
-        del tmp
+    value_columns = [c for c in df.columns if c not in index_col]
+    n_rows = len(df)
+
+    # Repeat every row once per sub-bin and shift each copy's age start by its offset.
+    index = df[index_col].iloc[np.tile(np.arange(n_rows), prev_age_bin_sz)].reset_index(drop=True)
+    index['age_start'] = index['age_start'].values + np.repeat(np.arange(prev_age_bin_sz), n_rows)
+    index['age_end'] = index['age_start'] + 1
     # handle tail edge case
-    last_age_bin_start = max(final_df["age_start"])
-    final_df.loc[final_df["age_start"] == last_age_bin_start, "age_end"] = 125.0
-    final_df = final_df.set_index(index_col)
-    return final_df
+    index.loc[index['age_start'] == index['age_start'].max(), 'age_end'] = 125.0
+
+    values = np.tile(df[value_columns].values, (prev_age_bin_sz, 1))
+    return pd.DataFrame(values, index=pd.MultiIndex.from_frame(index), columns=value_columns)
 
 
-def _load_hrhpv_raw(path) -> pd.DataFrame:
+def _load_hrhpv_raw(path, draws: Tuple[int, ...]) -> pd.DataFrame:
     df = pd.read_csv(path)
     del df['Unnamed: 0']
     df = df.set_index(ARTIFACT_INDEX_COLUMNS)
-    return df
+    return df[get_draw_columns(draws)]
 
 
 def get_entity(key: str):
@@ -0,0 +1,100 @@
+"""Dependency-aware parallel building of the keys in a single artifact.
+
+Most artifact keys are independent transforms of a handful of raw forecast
+files. The scheduler first parses each raw file a key depends on into the
+intermediate cache, then computes every key whose inputs are ready in a
+process pool. Workers only compute data. All writes to the artifact happen
+in the calling process, which acts as the single HDF writer, so the
+artifact file is never opened by more than one process.
+
+.. admonition::
+
+   Logging in this module should be done at the ``debug`` level.
+
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+from vivarium.framework.artifact import Artifact
+
+from vivarium_csu_swissre_cervical_cancer.data import builder, cache, loader
+
+
+def build_keys(artifact: Artifact, keys: List[str], location: str, draws: List[int] = None,
+               by_draw: bool = False, float32: bool = False, by_province: bool = False, workers: int = None,
+               verify: bool = False):
+    """Computes keys missing or stale in the artifact in parallel and writes them.
+
+    Parameters
+    ----------
+    artifact
+        The artifact to write to.
+    keys
+        The entity keys to build.
+    location
+        The location associated with the data to load and the artifact to
+        write to.
+    draws
+        The input draws to load. Defaults to all draws.
+    by_draw
+        Whether to store keys in ``data_keys.BY_DRAW_KEYS`` one column per
+        draw.
+    float32
+        Whether to store draw columns in single precision.
+    by_province
+        Whether to store keys in ``data_keys.PROVINCE_SHARD_KEYS`` by
+        province.
+    workers
+        The number of worker processes. Defaults to the number of CPUs.
+    verify
+        Whether to read newly written data back from the artifact to check
+        it.
+
+    """
+    keys = [key for key in keys if not builder.is_up_to_date(artifact, key, location, draws, by_draw, float32,
+                                                                 by_province)]
+    if not keys:
+        logger.debug('All requested keys already in artifact and up to date.  Skipping...')
+        return
+
+    draws = tuple(draws) if draws is not None else None
+    cache_dir = cache.get_cache_dir()
+    key_inputs = {key: set(loader.get_raw_data_inputs(key)) for key in keys}
+    raw_inputs = set().union(*key_inputs.values())
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Dict[Future, Tuple[str, str]] = {}
+        for data_path in raw_inputs:
+            logger.debug(f'Parsing raw data at {str(data_path)}.')
+            pending[executor.submit(_prepare_raw_data, data_path, cache_dir)] = ('input', data_path)
+
+        ready_inputs: Set[Path] = set()
+        waiting = dict(key_inputs)
+        while waiting or pending:
+            for key in [key for key, inputs in waiting.items() if inputs <= ready_inputs]:
+                logger.debug(f'Loading data for {key} for location {location}.')
+                pending[executor.submit(_load_data, key, location, draws, by_province, cache_dir)] = ('key', key)
+                del waiting[key]
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, item = pending.pop(future)
+                result = future.result()
+                if kind == 'input':
+                    ready_inputs.add(item)
+                else:
+                    builder.write_key_data(artifact, item, result, location, draws, by_draw, float32, by_province,
+                                           verify)
+
+
+def _prepare_raw_data(data_path: Path, cache_dir: Optional[Path]):
+    cache.set_cache_dir(cache_dir)
+    loader.prepare_raw_data(data_path)
+
+
+def _load_data(key: str, location: str, draws: Optional[Tuple[int, ...]], by_province: bool,
+               cache_dir: Optional[Path]):
+    cache.set_cache_dir(cache_dir)
+    return builder.load_data(key, location, draws, by_province)
@@ -1,17 +1,28 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, reduce
 from pathlib import Path
-from typing import NamedTuple, List
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, List, Tuple
 
+import numpy as np
 import pandas as pd
 import yaml
 
-from vivarium_csu_swissre_cervical_cancer import results
+from vivarium_csu_swissre_cervical_cancer import column_registry, results, scenarios
 
 
 SCENARIO_COLUMN = 'scenario'
+COMPARISON_COLUMN = 'comparison'
 GROUPBY_COLUMNS = [
     results.INPUT_DRAW_COLUMN,
     SCENARIO_COLUMN
 ]
+SEED_COLUMNS = [
+    results.INPUT_DRAW_COLUMN,
+    results.RANDOM_SEED_COLUMN
+]
+CELL_COLUMNS = SEED_COLUMNS + [SCENARIO_COLUMN]
+DUMP_FORMATS = ('hdf', 'parquet', 'csv')
+SUMMARY_PERCENTILES = (2.5, 97.5)
 OUTPUT_COLUMN_SORT_ORDER = [
     'age_group',
     'sex',
@@ -24,21 +35,100 @@ OUTPUT_COLUMN_SORT_ORDER = [
 
 
 def make_measure_data(data):
-    measure_data = MeasureData(
-        population=get_population_data(data),
-        person_time=get_measure_data(data, 'person_time'),
-        ylls=get_by_cause_measure_data(data, 'ylls', False, False, False),
-        ylds=get_by_cause_measure_data(data, 'ylds', False, False, False),
-        deaths=get_by_cause_measure_data(data, 'deaths', False, False, False),
-        disease_state_person_time=get_state_person_time_measure_data(data, 'disease_state_person_time',
-                                                                     False, False, False),
-        screening_state_person_time=get_state_person_time_measure_data(data, 'screening_state_person_time'),
-        disease_transition_count=get_transition_count_measure_data(data, 'disease_transition_count',
-                                                                   False, False, False),
-        screening_transition_count=get_transition_count_measure_data(data, 'screening_transition_count'),
-        event_count=get_measure_data(data, 'event_count'),
-    )
-    return measure_data
+    long_data = pivot_data(data[[c for c in data.columns if c != results.RANDOM_SEED_COLUMN]])
+    return MeasureData(**{measure: build_measure_data(long_data, measure, get_value_dtype(data, measure))
+                          for measure in MeasureData._fields})
+
+
+def make_measure_data_from_store(path: Path, workers: int = 1) -> 'MeasureData':
+    """Builds every measure from an aggregated output store.
+
+    Each measure is built from only its own columns, read from the store
+    written by ``write_measure_columns``, so measures can be built
+    independently of one another. Each measure's columns are melted once,
+    as ``make_measure_data`` does for all columns of in-memory output.
+
+    Parameters
+    ----------
+    path
+        The aggregated output store.
+    workers
+        The number of processes used to build measures at once.
+
+    Returns
+    -------
+        The data for every measure.
+
+    """
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {measure: executor.submit(read_measure_data, path, measure) for measure in MeasureData._fields}
+            return MeasureData(**{measure: future.result() for measure, future in futures.items()})
+    return MeasureData(**{measure: read_measure_data(path, measure) for measure in MeasureData._fields})
+
+
+def read_measure_data(path: Path, measure: str) -> pd.DataFrame:
+    """Reads and builds a single measure, melting its stored columns at once."""
+    data = read_measure_columns(path, measure)
+    return build_measure_data(pivot_data(data), measure, get_value_dtype(data, measure))
+
+
+def build_measure_data(long_data: pd.DataFrame, measure: str, dtype: np.dtype) -> pd.DataFrame:
+    """Formats the rows of a single measure from long output data.
+
+    Parameters
+    ----------
+    long_data
+        Output data melted by ``pivot_data``.
+    measure
+        The measure to build.
+    dtype
+        The type of the values of the measure in the wide output data.
+
+    Returns
+    -------
+        The sorted data for the measure with the fields of its result
+        columns decoded.
+
+    """
+    data = get_measure_rows(long_data, measure)
+    data['value'] = data['value'].astype(dtype)
+    return MEASURE_BUILDERS[measure](data)
+
+
+def get_measure_rows(long_data: pd.DataFrame, measure: str) -> pd.DataFrame:
+    """Selects the rows of a measure from long output data, in pivot order."""
+    processes = long_data['process'].cat.categories
+    positions = processes.get_indexer(get_measure_columns(measure))
+    if (positions < 0).any():
+        raise KeyError(f'Output data is missing {(positions < 0).sum()} result columns for {measure}.')
+    rows = (np.arange(len(long_data) // len(processes))[:, np.newaxis] * len(processes) + positions).ravel()
+    data = long_data.iloc[rows].reset_index(drop=True)
+    data['process'] = data['process'].cat.remove_unused_categories()
+    return data
+
+
+def get_value_dtype(data: pd.DataFrame, measure: str) -> np.dtype:
+    return reduce(np.promote_types, data[get_measure_columns(measure)].dtypes.unique())
+
+
+def get_measure_columns(measure: str) -> List[str]:
+    registry = column_registry.get_registry()
+    columns = registry.get_columns(measure)
+    if measure == 'population':
+        columns = [results.TOTAL_POPULATION_COLUMN] + columns
+    return columns
+
+
+def write_measure_columns(data: pd.DataFrame, path: Path):
+    """Writes aggregated output with the columns of each measure under their own key."""
+    with pd.HDFStore(str(path), mode='w') as store:
+        for measure in MeasureData._fields:
+            store.put(measure, data[get_measure_columns(measure) + GROUPBY_COLUMNS])
+
+
+def read_measure_columns(path: Path, measure: str) -> pd.DataFrame:
+    return pd.read_hdf(path, key=measure)
 
 
 class MeasureData(NamedTuple):
@@ -53,14 +143,163 @@ class MeasureData(NamedTuple):
     screening_transition_count: pd.DataFrame
     event_count: pd.DataFrame
 
-    def dump(self, output_dir: Path):
-        for key, df in self._asdict().items():
-            df.to_hdf(output_dir / f'{key}.hdf', key=key)
-            df.to_csv(output_dir / f'{key}.csv')
+    def dump(self, output_dir: Path, formats: Iterable[str] = ('hdf',), workers: int = 1):
+        """Writes every measure to ``output_dir`` in each of ``formats``.
+
+        Parameters
+        ----------
+        output_dir
+            The directory to write to.
+        formats
+            Any of ``DUMP_FORMATS``. Parquet output is written as a directory
+            per measure, partitioned by scenario or comparison, with the
+            string columns stored as categoricals.
+        workers
+            The number of processes used to write at once.
+
+        Raises
+        ------
+        ValueError
+            If an unknown format is requested.
+
+        """
+        unknown_formats = set(formats).difference(DUMP_FORMATS)
+        if unknown_formats:
+            raise ValueError(f'Unknown measure data formats {sorted(unknown_formats)}. '
+                             f'Formats must be in {DUMP_FORMATS}.')
+        writes = [(key, df, data_format) for key, df in self._asdict().items() for data_format in formats]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(write_measure, output_dir, *write) for write in writes]
+                for future in futures:
+                    future.result()
+        else:
+            for write in writes:
+                write_measure(output_dir, *write)
+
+    def summarize(self, percentiles: Iterable[float] = SUMMARY_PERCENTILES) -> 'MeasureData':
+        """Summarizes every measure over input draws with ``summarize_over_draws``."""
+        return MeasureData(**{key: summarize_over_draws(df, percentiles) for key, df in self._asdict().items()})
+
+    def compare(self, baseline: str = scenarios.SCENARIOS.baseline,
+                alternative: str = scenarios.SCENARIOS.alternative) -> 'MeasureData':
+        """Compares two scenarios in every measure with ``compare_scenarios``."""
+        return MeasureData(**{key: compare_scenarios(df, baseline, alternative) for key, df in self._asdict().items()})
+
+
+def summarize_over_draws(data: pd.DataFrame, percentiles: Iterable[float] = SUMMARY_PERCENTILES) -> pd.DataFrame:
+    """Computes the mean, median, and percentiles of each cell of a measure over draws.
+
+    The values are laid out as a (cell x draw) matrix so every statistic is
+    computed in a single vectorized pass. Draws missing for a cell are
+    ignored.
+
+    Parameters
+    ----------
+    data
+        Long measure data with a value per input draw and stratification
+        cell.
+    percentiles
+        The percentiles to compute, between 0 and 100.
+
+    Returns
+    -------
+        One row per cell with a column for each statistic. Percentile columns
+        are named like ``'2.5%'``.
+
+    """
+    percentiles = list(percentiles)
+    cell_columns = [c for c in data.columns if c not in [results.INPUT_DRAW_COLUMN, 'value']]
+    cell_codes, _ = pd.MultiIndex.from_frame(data[cell_columns]).factorize()
+    draw_codes, draws = pd.factorize(data[results.INPUT_DRAW_COLUMN])
+    _, first_rows = np.unique(cell_codes, return_index=True)
+
+    values = np.full((len(first_rows), len(draws)), np.nan)
+    values[cell_codes, draw_codes] = data['value'].values
+    quantiles = np.nanpercentile(values, [50] + percentiles, axis=1)
+
+    summary = data[cell_columns].iloc[first_rows].reset_index(drop=True)
+    summary['mean'] = np.nanmean(values, axis=1)
+    summary['median'] = quantiles[0]
+    for percentile, quantile in zip(percentiles, quantiles[1:]):
+        summary[f'{percentile:g}%'] = quantile
+    return sort_data(summary)
+
+
+def compare_scenarios(data: pd.DataFrame, baseline: str = scenarios.SCENARIOS.baseline,
+                      alternative: str = scenarios.SCENARIOS.alternative) -> pd.DataFrame:
+    """Computes paired differences and ratios between two scenarios by draw.
+
+    The values of both scenarios are laid out as a (cell x scenario) matrix,
+    where a cell is every stratification including the input draw, and
+    compared in a single vectorized pass. Cells missing either scenario are
+    dropped.
+
+    Parameters
+    ----------
+    data
+        Long measure data with a value per scenario, input draw, and
+        stratification cell.
+    baseline
+        The scenario compared against.
+    alternative
+        The scenario being evaluated.
+
+    Returns
+    -------
+        Long data with the comparison in the ``comparison`` column. Rows
+        with comparison ``'averted'`` hold the baseline value minus the
+        alternative value, and rows with ``'ratio'`` hold the alternative value
+        over the baseline value.
+
+    """
+    data = data.loc[data[SCENARIO_COLUMN].isin([baseline, alternative])]
+    cell_columns = [c for c in data.columns if c not in [SCENARIO_COLUMN, 'value']]
+    cell_codes, _ = pd.MultiIndex.from_frame(data[cell_columns]).factorize()
+    _, first_rows = np.unique(cell_codes, return_index=True)
+    scenario_codes = (data[SCENARIO_COLUMN] == alternative).values.astype(int)
+
+    values = np.full((len(first_rows), 2), np.nan)
+    values[cell_codes, scenario_codes] = data['value'].values
+    paired = ~np.isnan(values).any(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        comparisons = {
+            'averted': values[paired, 0] - values[paired, 1],
+            'ratio': values[paired, 1] / values[paired, 0],
+        }
+
+    cells = data[cell_columns].iloc[first_rows[paired]].reset_index(drop=True)
+    comparison = pd.concat([cells.assign(**{COMPARISON_COLUMN: name, 'value': value})
+                            for name, value in comparisons.items()], ignore_index=True)
+    return sort_data(comparison)
+
+
+def write_measure(output_dir: Path, key: str, data: pd.DataFrame, data_format: str):
+    if data_format == 'hdf':
+        data.to_hdf(output_dir / f'{key}.hdf', key=key)
+    elif data_format == 'csv':
+        data.to_csv(output_dir / f'{key}.csv')
+    elif data_format == 'parquet':
+        categorical_columns = {c: 'category' for c in data.columns if pd.api.types.is_string_dtype(data[c])}
+        partition_columns = [c for c in [SCENARIO_COLUMN, COMPARISON_COLUMN] if c in data.columns]
+        data.astype(categorical_columns).to_parquet(str(output_dir / f'{key}.parquet'), index=False,
+                                                    partition_cols=partition_columns)
+    else:
+        raise ValueError(f'Unknown measure data format {data_format}.')
 
 
-def read_data(path: Path, single_run: bool) -> (pd.DataFrame, List[str]):
-    data = pd.read_hdf(path)
+def read_keyspace(path: Path, single_run: bool) -> Dict[str, List]:
+    if single_run:
+        keyspace = {results.INPUT_DRAW_COLUMN: [0],
+                    results.RANDOM_SEED_COLUMN: [0],
+                    'screening_algorithm.scenario': ['baseline']}
+    else:
+        with (path.parent / 'keyspace.yaml').open() as f:
+            keyspace = yaml.full_load(f)
+    return keyspace
+
+
+def clean_data(data: pd.DataFrame, single_run: bool) -> pd.DataFrame:
     # noinspection PyUnresolvedReferences
     data = (data
             .drop(columns=data.columns.intersection(results.THROWAWAY_COLUMNS))
@@ -71,52 +310,319 @@ def read_data(path: Path, single_run: bool) -> (pd.DataFrame, List[str]):
         data[results.INPUT_DRAW_COLUMN] = 0
         data[results.RANDOM_SEED_COLUMN] = 0
         data['scenario'] = 'baseline'
-        keyspace = {results.INPUT_DRAW_COLUMN: [0],
-                    results.RANDOM_SEED_COLUMN: [0],
-                    'screening_algorithm.scenario': ['baseline']}
     else:
         data[results.INPUT_DRAW_COLUMN] = data[results.INPUT_DRAW_COLUMN].astype(int)
         data[results.RANDOM_SEED_COLUMN] = data[results.RANDOM_SEED_COLUMN].astype(int)
-        with (path.parent / 'keyspace.yaml').open() as f:
-            keyspace = yaml.full_load(f)
-    return data, keyspace
-
-
-def filter_out_incomplete(data, keyspace):
-    output = []
-    for draw in keyspace[results.INPUT_DRAW_COLUMN]:
-        # For each draw, gather all random seeds completed for all scenarios.
-        random_seeds = set(keyspace[results.RANDOM_SEED_COLUMN])
-        draw_data = data.loc[data[results.INPUT_DRAW_COLUMN] == draw]
-        for scenario in keyspace[results.OUTPUT_SCENARIO_COLUMN]:
-            seeds_in_data = draw_data.loc[data[SCENARIO_COLUMN] == scenario,
-                                          results.RANDOM_SEED_COLUMN].unique()
-            random_seeds = random_seeds.intersection(seeds_in_data)
-        draw_data = draw_data.loc[draw_data[results.RANDOM_SEED_COLUMN].isin(random_seeds)]
-        output.append(draw_data)
-    return pd.concat(output, ignore_index=True).reset_index(drop=True)
-
-
-def aggregate_over_seed(data):
-    non_count_columns = []
-    for non_count_template in results.NON_COUNT_TEMPLATES:
-        non_count_columns += results.RESULT_COLUMNS(non_count_template)
-    count_columns = [c for c in data.columns if c not in non_count_columns + GROUPBY_COLUMNS]
-
-    # non_count_data = data[non_count_columns + GROUPBY_COLUMNS].groupby(GROUPBY_COLUMNS).mean()
-    count_data = data[count_columns + GROUPBY_COLUMNS].groupby(GROUPBY_COLUMNS).sum()
-    return pd.concat([
-        count_data,
-        # non_count_data
-    ], axis=1).reset_index()
+    return data
+
+
+def read_data_chunks(path: Path, single_run: bool, chunksize: int,
+                     start: int = 0) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """Reads the simulation output in blocks of rows.
+
+    Parameters
+    ----------
+    path
+        The simulation output file.
+    single_run
+        Whether the output is from a single, non-parallel run.
+    chunksize
+        The maximum number of rows to hold in memory at once.
+    start
+        The first row of the output to read.
+
+    Yields
+    ------
+        The position of the first row of each block in the output and the
+        cleaned block of output data.
+
+    """
+    with pd.HDFStore(str(path), mode='r') as store:
+        key = _get_output_key(store)
+        row_count = _get_row_count(store, key)
+        for chunk_start in range(start, row_count, chunksize):
+            chunk = store.select(key, start=chunk_start, stop=chunk_start + chunksize)
+            yield chunk_start, clean_data(chunk, single_run)
+
+
+def read_data_rows(path: Path, single_run: bool, positions: Iterable[int],
+                   chunksize: int) -> Iterator[Tuple[np.ndarray, pd.DataFrame]]:
+    """Reads only the given rows of the simulation output.
+
+    Rows are read in the same blocks as ``read_data_chunks`` and blocks
+    without any requested rows are skipped.
+
+    Yields
+    ------
+        The positions of the rows in the output and the cleaned output data
+        at those rows.
+
+    """
+    positions = np.unique(np.asarray(list(positions), dtype=int))
+    with pd.HDFStore(str(path), mode='r') as store:
+        key = _get_output_key(store)
+        for block in np.unique(positions // chunksize):
+            chunk_start = block * chunksize
+            chunk_positions = positions[positions // chunksize == block]
+            chunk = store.select(key, start=chunk_start, stop=chunk_start + chunksize)
+            yield chunk_positions, clean_data(chunk.iloc[chunk_positions - chunk_start], single_run)
+
+
+def read_row_count(path: Path) -> int:
+    with pd.HDFStore(str(path), mode='r') as store:
+        return _get_row_count(store, _get_output_key(store))
+
+
+def _get_output_key(store: pd.HDFStore) -> str:
+    keys = store.keys()
+    if len(keys) != 1:
+        raise ValueError(f'Expected a single table in the simulation output, found {keys}.')
+    return keys[0]
+
+
+def _get_row_count(store: pd.HDFStore, key: str) -> int:
+    storer = store.get_storer(key)
+    if storer.is_table:
+        return storer.nrows
+    # Fixed format frames store their row index as the second axis.
+    return len(storer.read_index('axis1'))
+
+
+def get_complete_seeds(data: pd.DataFrame, keyspace: Dict[str, List]) -> pd.DataFrame:
+    """Gets the (draw, seed) pairs in the keyspace with output for every scenario.
+
+    Parameters
+    ----------
+    data
+        Output data or output cells with the draw, seed, and scenario columns.
+    keyspace
+        The keyspace of the parallel run.
+
+    Returns
+    -------
+        A frame of the complete draw and random seed pairs.
+
+    """
+    scenarios = keyspace[results.OUTPUT_SCENARIO_COLUMN]
+    in_keyspace = (data[results.INPUT_DRAW_COLUMN].isin(keyspace[results.INPUT_DRAW_COLUMN])
+                   & data[results.RANDOM_SEED_COLUMN].isin(keyspace[results.RANDOM_SEED_COLUMN])
+                   & data[SCENARIO_COLUMN].isin(scenarios))
+    scenario_counts = data.loc[in_keyspace].groupby(SEED_COLUMNS)[SCENARIO_COLUMN].nunique()
+    return scenario_counts[scenario_counts == len(set(scenarios))].index.to_frame(index=False)
+
+
+def get_missing_cells(data: pd.DataFrame, keyspace: Dict[str, List]) -> pd.DataFrame:
+    """Gets the (draw, seed, scenario) cells in the keyspace with no output.
+
+    Parameters
+    ----------
+    data
+        Output data or output cells with the draw, seed, and scenario columns.
+    keyspace
+        The keyspace of the parallel run.
+
+    Returns
+    -------
+        A frame of the draw, random seed, and scenario of each missing cell,
+        named as in the keyspace so it can be used to rerun them.
+
+    """
+    expected = pd.MultiIndex.from_product([keyspace[results.INPUT_DRAW_COLUMN],
+                                           keyspace[results.RANDOM_SEED_COLUMN],
+                                           keyspace[results.OUTPUT_SCENARIO_COLUMN]], names=CELL_COLUMNS)
+    present = pd.MultiIndex.from_frame(data[CELL_COLUMNS])
+    missing = expected[~expected.isin(present)].to_frame(index=False)
+    return missing.rename(columns={SCENARIO_COLUMN: results.OUTPUT_SCENARIO_COLUMN})
+
+
+def get_count_columns(columns: Iterable[str], excluded: List[str]) -> List[str]:
+    """Gets the columns summed over random seeds, in their original order."""
+    registry = column_registry.get_registry()
+    non_count_measures = set(results.NON_COUNT_TEMPLATES)
+    excluded = set(excluded)
+    return [c for c in columns
+            if c not in excluded and not (c in registry and registry.get_measure(c) in non_count_measures)]
+
+
+class SeedAggregator:
+    """Running sums of the count columns of the output by draw and scenario.
+
+    Output rows are added in blocks as they are read, so only the sums and a
+    record of which (draw, seed, scenario) cell each row belongs to are held
+    in memory. Rows for draws, seeds, or scenarios outside the keyspace are
+    ignored. A random seed only counts toward a draw once it has completed
+    for every scenario; rows from seeds that have not are subtracted back out
+    before the sums are used.
+
+    """
+
+    def __init__(self, keyspace: Dict[str, List]):
+        self.keyspace = keyspace
+        self.seeds = keyspace[results.RANDOM_SEED_COLUMN]
+        self.groups = pd.MultiIndex.from_product([sorted(keyspace[results.INPUT_DRAW_COLUMN]),
+                                                  sorted(keyspace[results.OUTPUT_SCENARIO_COLUMN])],
+                                                 names=GROUPBY_COLUMNS)
+        self.columns = None
+        self.dtypes = None
+        self.sums = None
+        self._cells = []
+
+    def add(self, data: pd.DataFrame, positions: np.ndarray):
+        """Adds a block of output rows found at ``positions`` in the output."""
+        self._initialize(data)
+        group_index, in_keyspace = self._get_group_index(data)
+        self._accumulate(data.loc[in_keyspace], group_index[in_keyspace], 1)
+        self._record_cells(data.loc[in_keyspace], np.asarray(positions)[in_keyspace])
+
+    def subtract(self, data: pd.DataFrame):
+        """Removes a block of previously added output rows from the sums."""
+        group_index, in_keyspace = self._get_group_index(data)
+        self._accumulate(data.loc[in_keyspace], group_index[in_keyspace], -1)
+
+    @property
+    def cells(self) -> pd.DataFrame:
+        """The (draw, seed, scenario) cell and output position of every row added."""
+        if not self._cells:
+            return pd.DataFrame(columns=CELL_COLUMNS + ['position'])
+        self._cells = [pd.concat(self._cells, ignore_index=True)]
+        return self._cells[0]
+
+    def get_incomplete_rows(self) -> pd.DataFrame:
+        """Gets the cells of rows added for seeds that are missing a scenario."""
+        cells = self.cells
+        complete_seeds = pd.MultiIndex.from_frame(get_complete_seeds(cells, self.keyspace))
+        is_complete = pd.MultiIndex.from_frame(cells[SEED_COLUMNS]).isin(complete_seeds)
+        return cells.loc[~is_complete]
+
+    def get_missing_cells(self) -> pd.DataFrame:
+        """Gets the (draw, seed, scenario) cells in the keyspace not yet added."""
+        return get_missing_cells(self.cells, self.keyspace)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Gets the sums for groups with at least one complete random seed."""
+        complete = self.cells.drop(self.get_incomplete_rows().index)
+        present = self.groups.isin(pd.MultiIndex.from_frame(complete[GROUPBY_COLUMNS]))
+        sums = self.sums[present]
+        data = pd.DataFrame({column: sums[:, i].astype(dtype) for i, (column, dtype) in enumerate(self.dtypes.items())},
+                            index=self.groups[present], columns=self.columns)
+        return data.reset_index()
+
+    def _initialize(self, data: pd.DataFrame):
+        if self.columns is None:
+            self.columns = get_count_columns(data.columns, GROUPBY_COLUMNS + [results.RANDOM_SEED_COLUMN])
+            self.dtypes = data[self.columns].dtypes
+            self.sums = np.zeros((len(self.groups), len(self.columns)))
+
+    def _record_cells(self, data: pd.DataFrame, positions: np.ndarray):
+        cells = data[CELL_COLUMNS].reset_index(drop=True)
+        cells['position'] = positions
+        self._cells.append(cells)
+
+    def _get_group_index(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        group_index = self.groups.get_indexer(pd.MultiIndex.from_frame(data[GROUPBY_COLUMNS]))
+        in_keyspace = (group_index >= 0) & data[results.RANDOM_SEED_COLUMN].isin(self.seeds).values
+        return group_index, in_keyspace
+
+    def _accumulate(self, data: pd.DataFrame, group_index: np.ndarray, sign: int):
+        if data.empty:
+            return
+        group_sums = data[self.columns].groupby(group_index).sum()
+        self.sums[group_sums.index.values] += sign * group_sums.values
+
+
+class IncrementalSeedAggregator(SeedAggregator):
+    """Seed aggregation that persists between runs and only reads new output.
+
+    Rows are held as pending rows until their random seed has completed for
+    every scenario, then folded into the sums, so the sums never include
+    incomplete seeds and nothing is subtracted. The sums, the pending rows,
+    the cells already consumed, and the number of output rows read are saved
+    to a state file, so a later run only reads rows appended to the output
+    since the last one. Rows for cells already consumed are skipped.
+
+    """
+
+    def __init__(self, keyspace: Dict[str, List]):
+        super().__init__(keyspace)
+        self.rows_read = 0
+        self.pending = None
+
+    def add(self, data: pd.DataFrame, positions: np.ndarray):
+        """Adds a block of output rows found at ``positions`` in the output."""
+        positions = np.asarray(positions)
+        if len(positions):
+            self.rows_read = max(self.rows_read, int(positions.max()) + 1)
+        self._initialize(data)
+        if self.pending is None:
+            self.pending = data.iloc[:0][CELL_COLUMNS + self.columns]
+
+        consumed = pd.MultiIndex.from_frame(self.cells[CELL_COLUMNS])
+        _, in_keyspace = self._get_group_index(data)
+        is_new = in_keyspace & ~pd.MultiIndex.from_frame(data[CELL_COLUMNS]).isin(consumed)
+        self.pending = pd.concat([self.pending, data.loc[is_new, CELL_COLUMNS + self.columns]], ignore_index=True)
+        self._record_cells(data.loc[is_new], positions[is_new])
+        self._fold_complete_seeds()
+
+    def save(self, path: Path):
+        """Writes the aggregation state to ``path``."""
+        if self.columns is None:
+            return
+        with pd.HDFStore(str(path), mode='w') as store:
+            store.put('sums', pd.DataFrame(self.sums, index=self.groups, columns=self.columns))
+            store.put('pending', self.pending)
+            store.put('cells', self.cells)
+            attributes = store.get_storer('sums').attrs
+            attributes.keyspace = self.keyspace
+            attributes.rows_read = self.rows_read
+
+    @classmethod
+    def load(cls, path: Path, keyspace: Dict[str, List]) -> 'IncrementalSeedAggregator':
+        """Reads the aggregation state saved at ``path``.
+
+        Returns
+        -------
+            The saved aggregation, or an empty one if there is no saved state
+            or it was saved for a different keyspace.
+
+        """
+        aggregator = cls(keyspace)
+        if not path.exists():
+            return aggregator
+        with pd.HDFStore(str(path), mode='r') as store:
+            attributes = store.get_storer('sums').attrs
+            if attributes.keyspace != keyspace:
+                return aggregator
+            sums = store['sums']
+            aggregator.columns = list(sums.columns)
+            aggregator.sums = np.array(sums.values, dtype=float)
+            aggregator.pending = store['pending']
+            aggregator.dtypes = aggregator.pending[aggregator.columns].dtypes
+            aggregator._cells = [store['cells']]
+            aggregator.rows_read = attributes.rows_read
+        return aggregator
+
+    def _fold_complete_seeds(self):
+        complete_seeds = pd.MultiIndex.from_frame(get_complete_seeds(self.cells, self.keyspace))
+        is_complete = pd.MultiIndex.from_frame(self.pending[SEED_COLUMNS]).isin(complete_seeds)
+        group_index, _ = self._get_group_index(self.pending.loc[is_complete])
+        self._accumulate(self.pending.loc[is_complete], group_index, 1)
+        self.pending = self.pending.loc[~is_complete].reset_index(drop=True)
 
 
 def pivot_data(data):
-    return (data
-            .set_index(GROUPBY_COLUMNS)
-            .stack()
-            .reset_index()
-            .rename(columns={f'level_{len(GROUPBY_COLUMNS)}': 'process', 0: 'value'}))
+    """Melts every non-group column of wide output data into a long table.
+
+    Rows are ordered by the row of the wide data and then by column, and the
+    ``process`` column is categorical over the melted column names.
+
+    """
+    value_columns = [c for c in data.columns if c not in GROUPBY_COLUMNS]
+    long_data = pd.DataFrame({column: np.repeat(data[column].values, len(value_columns))
+                              for column in GROUPBY_COLUMNS}, columns=GROUPBY_COLUMNS)
+    long_data['process'] = pd.Categorical.from_codes(np.tile(np.arange(len(value_columns)), len(data)),
+                                                     categories=value_columns)
+    long_data['value'] = data[value_columns].values.ravel()
+    return long_data
 
 
 def sort_data(data):
@@ -128,54 +634,126 @@ def sort_data(data):
 
 def split_processing_column(data, has_screening_stratification=False, has_vax_stratification=False,
                             has_treatment_stratification=False):
+    decoder = partial(decode_process_name,
+                      has_screening_stratification=has_screening_stratification,
+                      has_vax_stratification=has_vax_stratification,
+                      has_treatment_stratification=has_treatment_stratification)
+    columns = get_process_fields(has_screening_stratification, has_vax_stratification, has_treatment_stratification)
+    decoded = decode_unique(data['process'], decoder, columns)
+    data = data.drop(columns='process')
+    for column in columns:
+        data[column] = decoded[column]
+    return data
+
+
+def get_process_fields(has_screening_stratification=False, has_vax_stratification=False,
+                       has_treatment_stratification=False) -> List[str]:
+    fields = []
+    if has_treatment_stratification:
+        fields.append('treatment_state')
+    if has_vax_stratification:
+        fields.append('vaccination_state')
+    if has_screening_stratification:
+        fields.append('screening_result')
+    return fields + ['age_cohort', 'year', 'measure']
+
+
+def decode_process_name(process: str, has_screening_stratification=False, has_vax_stratification=False,
+                        has_treatment_stratification=False) -> Tuple:
+    """Splits a result column name into the fields of ``get_process_fields``."""
+    fields = []
     if has_treatment_stratification:
-        data['process'], data['treatment_state'] = data.process.str.split('_treatment_state_').str
+        process, treatment_state = _split_field(process, '_treatment_state_')
+        fields.append(treatment_state)
     if has_vax_stratification:
-        data['process'], data['vaccination_state'] = data.process.str.split('_vaccination_state_').str
+        process, vaccination_state = _split_field(process, '_vaccination_state_')
+        fields.append(vaccination_state)
     if has_screening_stratification:
-        data['process'], data['screening_result'] = data.process.str.split('_screening_result_').str
-    data['process'], data['age_cohort'] = data.process.str.split('_age_cohort_').str
-    data['year'] = data.process.str.split('_in_').str[-1]
-    data['measure'] = data.process.str.split('_in_').str[:-1].apply(lambda x: '_in_'.join(x))
-    return data.drop(columns='process')
+        process, screening_result = _split_field(process, '_screening_result_')
+        fields.append(screening_result)
+    process, age_cohort = _split_field(process, '_age_cohort_')
+    *measure, year = process.split('_in_')
+    return tuple(fields) + (age_cohort, year, '_in_'.join(measure))
+
+
+def decode_unique(values: pd.Series, decoder: Callable[[str], Tuple], columns: List[str]) -> pd.DataFrame:
+    """Decodes each unique value once and maps the fields back onto every row.
+
+    Parameters
+    ----------
+    values
+        The values to decode.
+    decoder
+        A function from a single value to a tuple with one field per column.
+    columns
+        The names of the decoded fields.
+
+    Returns
+    -------
+        The decoded fields of every value, aligned with ``values``.
+
+    """
+    values = values.astype('category')
+    lookup = [decoder(value) for value in values.cat.categories]
+    codes = values.cat.codes.values
+    return pd.DataFrame({column: np.array([fields[i] for fields in lookup], dtype=object)[codes]
+                         for i, column in enumerate(columns)}, index=values.index, columns=columns)
+
+
+def _split_field(process: str, separator: str) -> Tuple[str, str]:
+    process, *field = process.split(separator)
+    return process, field[0] if field else np.nan
 
 
 def get_population_data(data):
-    total_pop = pivot_data(data[[results.TOTAL_POPULATION_COLUMN]
-                                + results.RESULT_COLUMNS('population')
-                                + GROUPBY_COLUMNS])
-    total_pop = total_pop.rename(columns={'process': 'measure'})
+    total_pop = data.rename(columns={'process': 'measure'})
+    total_pop['measure'] = total_pop['measure'].astype(object)
     return sort_data(total_pop)
 
 
-def get_measure_data(data, measure, has_screening_stratification=False, has_vax_stratification=False,
+def get_measure_data(data, has_screening_stratification=False, has_vax_stratification=False,
                      has_treatment_stratification=False):
-    data = pivot_data(data[results.RESULT_COLUMNS(measure) + GROUPBY_COLUMNS])
     data = split_processing_column(data, has_screening_stratification, has_vax_stratification,
                                    has_treatment_stratification)
     return sort_data(data)
 
 
-def get_by_cause_measure_data(data, measure, has_screening_stratification=False, has_vax_stratification=False,
+def get_by_cause_measure_data(data, has_screening_stratification=False, has_vax_stratification=False,
                               has_treatment_stratification=False):
-    data = get_measure_data(data, measure, has_screening_stratification, has_vax_stratification,
-                            has_treatment_stratification)
-    data['measure'], data['cause'] = data.measure.str.split('_due_to_').str
+    data = split_processing_column(data, has_screening_stratification, has_vax_stratification,
+                                   has_treatment_stratification)
+    decoded = decode_unique(data['measure'], partial(_split_field, separator='_due_to_'), ['measure', 'cause'])
+    data['measure'], data['cause'] = decoded['measure'], decoded['cause']
     return sort_data(data)
 
 
-def get_state_person_time_measure_data(data, measure, has_screening_stratification=False, has_vax_stratification=False,
+def get_state_person_time_measure_data(data, has_screening_stratification=False, has_vax_stratification=False,
                                        has_treatment_stratification=False):
-    data = get_measure_data(data, measure, has_screening_stratification, has_vax_stratification,
-                            has_treatment_stratification)
-    data['measure'], data['cause'] = 'state_person_time', data.measure.str.split('_person_time').str[0]
+    data = split_processing_column(data, has_screening_stratification, has_vax_stratification,
+                                   has_treatment_stratification)
+    decoded = decode_unique(data['measure'], partial(_split_field, separator='_person_time'), ['cause', 'suffix'])
+    data['measure'], data['cause'] = 'state_person_time', decoded['cause']
     return sort_data(data)
 
 
-def get_transition_count_measure_data(data, measure, has_screening_stratification=False, has_vax_stratification=False,
+def get_transition_count_measure_data(data, has_screening_stratification=False, has_vax_stratification=False,
                                       has_treatment_stratification=False):
     # Oops, edge case.
-    data = data.drop(columns=[c for c in data.columns if 'event_count' in c and '2041' in c])
-    data = get_measure_data(data, measure, has_screening_stratification, has_vax_stratification,
+    data = data.loc[~data['process'].isin([c for c in data['process'].cat.categories
+                                           if 'event_count' in c and '2041' in c])]
+    return get_measure_data(data, has_screening_stratification, has_vax_stratification,
                             has_treatment_stratification)
-    return sort_data(data)
+
+
+MEASURE_BUILDERS = {
+    'population': get_population_data,
+    'person_time': get_measure_data,
+    'ylls': get_by_cause_measure_data,
+    'ylds': get_by_cause_measure_data,
+    'deaths': get_by_cause_measure_data,
+    'disease_state_person_time': get_state_person_time_measure_data,
+    'screening_state_person_time': get_state_person_time_measure_data,
+    'disease_transition_count': get_transition_count_measure_data,
+    'screening_transition_count': get_transition_count_measure_data,
+    'event_count': get_measure_data,
+}
@@ -1,3 +1,3 @@
 from .app_logging import configure_logging_to_terminal
-from .make_artifacts import build_artifacts
+from .make_artifacts import build_artifacts, compare_artifacts
 from .make_specs import build_model_specifications
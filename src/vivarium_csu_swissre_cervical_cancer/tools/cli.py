@@ -16,16 +16,29 @@ The application will look for the model spec based on the python environment
 that is active and these files don't need to be specified if the
 default names and location are used.
 """
+from typing import List, Optional, Tuple
+
 import click
 from loguru import logger
 from vivarium.framework.utilities import handle_exceptions
 
 from vivarium_csu_swissre_cervical_cancer import metadata
 from vivarium_csu_swissre_cervical_cancer import paths
-from vivarium_csu_swissre_cervical_cancer.tools import build_artifacts
+from vivarium_csu_swissre_cervical_cancer.tools import build_artifacts, compare_artifacts
 from vivarium_csu_swissre_cervical_cancer.tools import build_model_specifications
 from vivarium_csu_swissre_cervical_cancer.tools import configure_logging_to_terminal
+from vivarium_csu_swissre_cervical_cancer.results_processing.process_results import DUMP_FORMATS, SUMMARY_PERCENTILES
 from vivarium_csu_swissre_cervical_cancer.tools.make_results import build_results
+from vivarium_csu_swissre_cervical_cancer.utilities import parse_draws
+
+
+def _parse_draws_option(ctx: click.Context, param: click.Parameter, value: Optional[str]) -> Optional[List[int]]:
+    if value is None:
+        return None
+    try:
+        return parse_draws(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
 
 
 @click.command()
@@ -68,7 +81,7 @@ def make_specs(template: str, location: str, output_dir: str, verbose: int, with
               show_default=True,
               type=click.Choice(metadata.LOCATIONS + ['all']),
               help=('Location for which to make an artifact. Note: prefer building archives on the cluster.\n'
-                    'If you specify location "all" you must be on a cluster node.'))
+                    'If you specify location "all" with the drmaa executor you must be on a cluster node.'))
 @click.option('-o', '--output-dir',
               default=str(paths.ARTIFACT_ROOT),
               show_default=True,
@@ -76,17 +89,78 @@ def make_specs(template: str, location: str, output_dir: str, verbose: int, with
               help='Specify an output directory. Directory must exist.')
 @click.option('-a', '--append',
               is_flag=True,
-              help='Append to the artifact instead of overwriting.')
+              help='Append to the artifact instead of overwriting. Only keys whose inputs have changed are rebuilt.')
+@click.option('-d', '--draws',
+              default=None,
+              callback=_parse_draws_option,
+              help='Input draws to include in the artifact, e.g. "0-99" or "0,5,10-20". Defaults to all draws.')
+@click.option('--by-draw',
+              is_flag=True,
+              help='Store large keys one column per draw so each simulation reads only its own draw.')
+@click.option('--float32',
+              is_flag=True,
+              help='Store draw columns in single precision, except for keys in data_keys.FLOAT64_KEYS.')
+@click.option('--by-province',
+              is_flag=True,
+              help='Store province weighted keys once per province and weight them when the simulation loads them.')
+@click.option('-w', '--workers',
+              default=1,
+              show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of processes used to build the keys of a single location artifact, '
+                   'or the number of locations built at once by the local executor.')
+@click.option('-e', '--executor',
+              default='drmaa',
+              show_default=True,
+              type=click.Choice(['drmaa', 'local']),
+              help='Backend used to build artifacts for location "all".')
+@click.option('--verify',
+              is_flag=True,
+              help='Read each key back from the artifact after writing it.')
 @click.option('-v', 'verbose',
               count=True,
               help='Configure logging verbosity.')
 @click.option('--pdb', 'with_debugger',
               is_flag=True,
               help='Drop into python debugger if an error occurs.')
-def make_artifacts(location: str, output_dir: str, append: bool, verbose: int, with_debugger: bool) -> None:
+def make_artifacts(location: str, output_dir: str, append: bool, draws: List[int], by_draw: bool, float32: bool,
+                   by_province: bool, workers: int, executor: str, verify: bool, verbose: int,
+                   with_debugger: bool) -> None:
     configure_logging_to_terminal(verbose)
     main = handle_exceptions(build_artifacts, logger, with_debugger=with_debugger)
-    main(location, output_dir, append, verbose)
+    main(location, output_dir, append, verbose, draws, by_draw, float32, by_province, workers, executor, verify)
+
+
+@click.command()
+@click.argument('reference', type=click.Path(exists=True, dir_okay=False))
+@click.argument('candidate', type=click.Path(exists=True, dir_okay=False))
+@click.option('--rtol',
+              default=1e-5,
+              show_default=True,
+              help='Relative tolerance for draw values.')
+@click.option('--atol',
+              default=1e-8,
+              show_default=True,
+              help='Absolute tolerance for draw values.')
+@click.option('-o', '--output-file',
+              default=None,
+              type=click.Path(dir_okay=False),
+              help='Write the comparison report to this csv file.')
+@click.option('-v', 'verbose',
+              count=True,
+              help='Configure logging verbosity.')
+@click.option('--pdb', 'with_debugger',
+              is_flag=True,
+              help='Drop into python debugger if an error occurs.')
+def make_artifact_comparison(reference: str, candidate: str, rtol: float, atol: float, output_file: Optional[str],
+                             verbose: int, with_debugger: bool) -> None:
+    """Compare the data in a CANDIDATE artifact, e.g. a float32 build,
+    against a REFERENCE artifact within a tolerance."""
+    configure_logging_to_terminal(max(verbose, 1))
+    main = handle_exceptions(compare_artifacts, logger, with_debugger=with_debugger)
+    report = main(reference, candidate, rtol, atol, output_file)
+    if not report['within_tolerance'].all():
+        raise click.ClickException(f'{(~report["within_tolerance"]).sum()} keys are outside tolerance.')
 
 
 @click.command()
@@ -101,7 +175,38 @@ def make_artifacts(location: str, output_dir: str, append: bool, verbose: int, w
               default=False,
               is_flag=True,
               help='Results are from a single, non-parallel run.')
-def make_results(output_file: str, verbose: int, with_debugger: bool, single_run: bool) -> None:
+@click.option('-c', '--chunksize',
+              default=metadata.MAKE_RESULTS_CHUNK_SIZE,
+              show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of output rows to read into memory at once.')
+@click.option('-w', '--workers',
+              default=1,
+              show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of processes used to build and write measures at once.')
+@click.option('-f', '--format', 'formats',
+              multiple=True,
+              default=['hdf'],
+              show_default=True,
+              type=click.Choice(list(DUMP_FORMATS)),
+              help='Format to write measure data in. May be given more than once.')
+@click.option('-p', '--percentile', 'percentiles',
+              multiple=True,
+              default=list(SUMMARY_PERCENTILES),
+              show_default=True,
+              type=click.FloatRange(min=0, max=100),
+              help='Percentile over draws to include in summary data. May be given more than once.')
+@click.option('-i', '--incremental',
+              is_flag=True,
+              help='Only read output rows added since the last incremental run, keeping aggregation state '
+                   'next to the output file.')
+@click.option('--summarize-comparisons',
+              is_flag=True,
+              help='Also summarize the scenario comparison data over draws.')
+def make_results(output_file: str, verbose: int, with_debugger: bool, single_run: bool, chunksize: int,
+                 workers: int, formats: Tuple[str, ...], percentiles: Tuple[float, ...], incremental: bool,
+                 summarize_comparisons: bool) -> None:
     configure_logging_to_terminal(verbose)
     main = handle_exceptions(build_results, logger, with_debugger=with_debugger)
-    main(output_file, single_run)
+    main(output_file, single_run, chunksize, workers, formats, percentiles, incremental, summarize_comparisons)
@@ -6,22 +6,29 @@
    Use your best judgement.
 
 """
+import abc
+import argparse
 import shutil
-import sys
 import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Union
+from typing import List, Union
 
 import click
+import numpy as np
+import pandas as pd
 import vivarium_cluster_tools as vct
 from loguru import logger
+from vivarium.framework.artifact import Artifact, EntityKey
 
 from vivarium_csu_swissre_cervical_cancer import metadata, data_keys
 from vivarium_csu_swissre_cervical_cancer.tools.app_logging import add_logging_sink, decode_status
-from vivarium_csu_swissre_cervical_cancer.utilities import sanitize_location
+from vivarium_csu_swissre_cervical_cancer.utilities import is_stored_by_draw, parse_draws, sanitize_location
 
 
-def build_artifacts(location: str, output_dir: str, append: bool, verbose: int):
+def build_artifacts(location: str, output_dir: str, append: bool, verbose: int, draws: List[int] = None,
+                    by_draw: bool = False, float32: bool = False, by_province: bool = False, workers: int = 1,
+                    executor: str = 'drmaa', verify: bool = False):
     """Main application function for building artifacts.
     Parameters
     ----------
@@ -38,6 +45,26 @@ def build_artifacts(location: str, output_dir: str, append: bool, verbose: int):
         directory.  Has no effect if artifacts are not found.
     verbose
         How noisy the logger should be.
+    draws
+        The input draws to include in the artifacts. Defaults to all draws.
+    by_draw
+        Whether to store large keys one column per draw so simulations can
+        read a single draw.
+    float32
+        Whether to store draw columns in single precision, except for keys
+        in ``data_keys.FLOAT64_KEYS``.
+    by_province
+        Whether to store keys in ``data_keys.PROVINCE_SHARD_KEYS`` once per
+        province and weight them when the simulation loads them.
+    workers
+        The number of processes used to build the keys of a single location
+        artifact, or the number of locations built at once by the local
+        executor.
+    executor
+        The backend used to build all locations. Either 'drmaa' to submit
+        cluster jobs or 'local' to use a process pool on this machine.
+    verify
+        Whether to read each key back from the artifact after writing it.
     """
     output_dir = Path(output_dir)
     # TODO: fix this so it doesn't have to have manual dir creation
@@ -52,7 +79,7 @@ def build_artifacts(location: str, output_dir: str, append: bool, verbose: int):
             logger.info(f'Deleting artifact at {str(path)}.')
             path.unlink()
 
-        build_single_location_artifact(path, location)
+        build_single_location_artifact(path, location, draws, by_draw, float32, by_province, workers, verify)
 
     elif location == 'all':
         # FIXME: could be more careful
@@ -69,14 +96,17 @@ def build_artifacts(location: str, output_dir: str, append: bool, verbose: int):
                 logger.info(f'Deleting artifact at {str(path)}.')
                 path.unlink()
 
-        build_all_artifacts(output_dir, verbose)
+        build_all_artifacts(output_dir, verbose, draws, by_draw, float32, by_province, executor, workers,
+                            verify)
 
     else:
         raise ValueError(f'Location must be one of {metadata.LOCATIONS} or the string "all". '
                          f'You specified {location}.')
 
 
-def build_all_artifacts(output_dir: Path, verbose: int):
+def build_all_artifacts(output_dir: Path, verbose: int, draws: List[int] = None, by_draw: bool = False,
+                        float32: bool = False, by_province: bool = False, executor: str = 'drmaa',
+                        workers: int = 1, verify: bool = False):
     """Builds artifacts for all locations in parallel.
     Parameters
     ----------
@@ -84,55 +114,158 @@ def build_all_artifacts(output_dir: Path, verbose: int):
         The directory where the artifacts will be built.
     verbose
         How noisy the logger should be.
+    draws
+        The input draws to include in the artifacts. Defaults to all draws.
+    by_draw
+        Whether to store large keys one column per draw.
+    float32
+        Whether to store draw columns in single precision.
+    by_province
+        Whether to store province sharded keys by province.
+    executor
+        The name of the backend that runs the location builds. One of the
+        keys of :data:`ARTIFACT_EXECUTORS`.
+    workers
+        The number of locations the local backend builds at once. Ignored by
+        the cluster backend.
+    verify
+        Whether to read each key back from the artifact after writing it.
     Note
     ----
         This function should not be called directly.  It is intended to be
         called by the :func:`build_artifacts` function located in the same
         module.
     """
-    from vivarium_cluster_tools.psimulate.utilities import get_drmaa
-    drmaa = get_drmaa()
-
-    jobs = {}
-    with drmaa.Session() as session:
+    failed = []
+    with ARTIFACT_EXECUTORS[executor](workers) as artifact_executor:
+        futures = {}
         for location in metadata.LOCATIONS:
             path = output_dir / f'{sanitize_location(location)}.hdf'
+            futures[artifact_executor.submit(path, location, draws, by_draw, float32, by_province, verify)] = location
+            logger.info(f'Submitted {executor} build of artifact for {location}.')
 
-            job_template = session.createJobTemplate()
-            job_template.remoteCommand = shutil.which("python")
-            job_template.args = [__file__, str(path), f'"{location}"']
-            job_template.nativeSpecification = (f'-V '  # Export all environment variables
-                                                f'-b y '  # Command is a binary (python)
-                                                f'-P {metadata.CLUSTER_PROJECT} '
-                                                f'-q {metadata.CLUSTER_QUEUE} '
-                                                f'-l fmem={metadata.MAKE_ARTIFACT_MEM} '
-                                                f'-l fthread={metadata.MAKE_ARTIFACT_CPU} '
-                                                f'-l h_rt={metadata.MAKE_ARTIFACT_RUNTIME} '
-                                                f'-l archive=TRUE '  # Need J-drive access for data
-                                                f'-N {sanitize_location(location)}_artifact')  # Name of the job
-            jobs[location] = (session.runJob(job_template), drmaa.JobState.UNDETERMINED)
-            logger.info(f'Submitted job {jobs[location][0]} to build artifact for {location}.')
-            session.deleteJobTemplate(job_template)
-
-        if verbose:
-            logger.info('Entering monitoring loop.')
-            logger.info('-------------------------')
-            logger.info('')
-
-            while any([job[1] not in [drmaa.JobState.DONE, drmaa.JobState.FAILED] for job in jobs.values()]):
-                for location, (job_id, status) in jobs.items():
-                    jobs[location] = (job_id, session.jobStatus(job_id))
-                    logger.info(f'{location:<35}: {decode_status(drmaa, jobs[location][1]):>15}')
-                logger.info('')
-                time.sleep(metadata.MAKE_ARTIFACT_SLEEP)
-                logger.info('Checking status again')
-                logger.info('---------------------')
-                logger.info('')
+        start = time.time()
+        for future in as_completed(futures):
+            location, error = futures[future], future.exception()
+            status = 'finished' if error is None else 'failed'
+            logger.info(f'{location:<35}: {status:>15} after {time.time() - start:.1f}s')
+            if error is not None:
+                logger.info(f'{location} failed with: {error}')
+                failed.append(location)
 
+    if failed:
+        raise RuntimeError(f'Artifact builds failed for {failed}.')
     logger.info('**Done**')
 
 
-def build_single_location_artifact(path: Union[str, Path], location: str, log_to_file: bool = False):
+class ArtifactExecutor(abc.ABC):
+    """Backend that runs single location artifact builds.
+
+    Submitting a build returns a :class:`concurrent.futures.Future` that
+    completes when the build does, so callers can react to builds as they
+    finish instead of polling for their status.
+    """
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+
+    @abc.abstractmethod
+    def submit(self, path: Path, location: str, draws: List[int] = None, by_draw: bool = False,
+               float32: bool = False, by_province: bool = False, verify: bool = False) -> Future:
+        pass
+
+    def shutdown(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+class LocalArtifactExecutor(ArtifactExecutor):
+    """Builds artifacts in a pool of processes on the current machine."""
+
+    def __init__(self, workers: int = 1):
+        super().__init__(workers)
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(self, path: Path, location: str, draws: List[int] = None, by_draw: bool = False,
+               float32: bool = False, by_province: bool = False, verify: bool = False) -> Future:
+        return self._pool.submit(build_single_location_artifact, path, location, draws, by_draw, float32,
+                                 by_province, verify=verify, log_to_file=True)
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+class DrmaaArtifactExecutor(ArtifactExecutor):
+    """Builds artifacts as jobs on the cluster.
+
+    Each job is waited on by a thread blocked in ``session.wait``, which
+    resolves the job's future as soon as the scheduler reports it finished.
+    """
+
+    def __init__(self, workers: int = 1):
+        super().__init__(workers)
+        from vivarium_cluster_tools.psimulate.utilities import get_drmaa
+        self._drmaa = get_drmaa()
+        self._session = self._drmaa.Session()
+        self._session.initialize()
+        self._waiters = ThreadPoolExecutor(max_workers=len(metadata.LOCATIONS))
+
+    def submit(self, path: Path, location: str, draws: List[int] = None, by_draw: bool = False,
+               float32: bool = False, by_province: bool = False, verify: bool = False) -> Future:
+        job_template = self._session.createJobTemplate()
+        job_template.remoteCommand = shutil.which("python")
+        # The drmaa args getter returns a copy, so build the list before assigning it.
+        args = [__file__, str(path), f'"{location}"']
+        if draws is not None:
+            args.append(f'--draws={",".join([str(draw) for draw in draws])}')
+        if by_draw:
+            args.append('--by-draw')
+        if float32:
+            args.append('--float32')
+        if by_province:
+            args.append('--by-province')
+        if verify:
+            args.append('--verify')
+        job_template.args = args
+        job_template.nativeSpecification = (f'-V '  # Export all environment variables
+                                            f'-b y '  # Command is a binary (python)
+                                            f'-P {metadata.CLUSTER_PROJECT} '
+                                            f'-q {metadata.CLUSTER_QUEUE} '
+                                            f'-l fmem={metadata.MAKE_ARTIFACT_MEM} '
+                                            f'-l fthread={metadata.MAKE_ARTIFACT_CPU} '
+                                            f'-l h_rt={metadata.MAKE_ARTIFACT_RUNTIME} '
+                                            f'-l archive=TRUE '  # Need J-drive access for data
+                                            f'-N {sanitize_location(location)}_artifact')  # Name of the job
+        job_id = self._session.runJob(job_template)
+        self._session.deleteJobTemplate(job_template)
+        status = decode_status(self._drmaa, self._session.jobStatus(job_id))
+        logger.info(f'Submitted job {job_id} to build artifact for {location}. Status: {status}.')
+        return self._waiters.submit(self._wait, job_id)
+
+    def _wait(self, job_id: str):
+        job_info = self._session.wait(job_id, self._drmaa.Session.TIMEOUT_WAIT_FOREVER)
+        if job_info.wasAborted or not job_info.hasExited or job_info.exitStatus != 0:
+            raise RuntimeError(f'Job {job_id} did not complete successfully.')
+
+    def shutdown(self):
+        self._waiters.shutdown()
+        self._session.exit()
+
+
+ARTIFACT_EXECUTORS = {
+    'drmaa': DrmaaArtifactExecutor,
+    'local': LocalArtifactExecutor,
+}
+
+
+def build_single_location_artifact(path: Union[str, Path], location: str, draws: List[int] = None,
+                                   by_draw: bool = False, float32: bool = False, by_province: bool = False,
+                                   workers: int = 1, verify: bool = False, log_to_file: bool = False):
     """Builds an artifact for a single location.
     Parameters
     ----------
@@ -141,6 +274,21 @@ def build_single_location_artifact(path: Union[str, Path], location: str, log_to
     location
         The location to build the artifact for.  Must be one of the locations
         specified in the project globals.
+    draws
+        The input draws to include in the artifact. Defaults to all draws.
+    by_draw
+        Whether to store large keys one column per draw.
+    float32
+        Whether to store draw columns in single precision.
+    by_province
+        Whether to store province sharded keys by province.
+    workers
+        The number of processes used to build keys. If more than one, keys
+        are built in parallel as soon as the raw data they depend on has
+        been parsed.
+    verify
+        Whether to read each key back from the artifact after writing it.
+        Keys that are already up to date are skipped either way.
     log_to_file
         Whether we should write the application logs to a file.
     Note
@@ -158,20 +306,115 @@ def build_single_location_artifact(path: Union[str, Path], location: str, log_to
         add_logging_sink(log_file, verbose=2)
 
     # Local import to avoid data dependencies
-    from vivarium_csu_swissre_cervical_cancer.data import builder
+    from vivarium_csu_swissre_cervical_cancer.data import builder, cache, scheduler
+
+    # Parsed raw data is shared by every artifact in the output directory.
+    cache.set_cache_dir(path.parent / 'cache')
 
     logger.info(f'Building artifact for {location} at {str(path)}.')
-    artifact = builder.open_artifact(path, location)
+    artifact = builder.open_artifact(path, location, draws)
 
-    for key_group in data_keys.MAKE_ARTIFACT_KEY_GROUPS:
-        logger.info(f'Loading and writing {key_group.log_name} data')
-        for key in key_group:
-            builder.load_and_write_data(artifact, key, location)
+    if workers > 1:
+        logger.info(f'Loading and writing data with {workers} processes')
+        keys = [key for key_group in data_keys.MAKE_ARTIFACT_KEY_GROUPS for key in key_group]
+        scheduler.build_keys(artifact, keys, location, draws, by_draw, float32, by_province, workers, verify)
+    else:
+        for key_group in data_keys.MAKE_ARTIFACT_KEY_GROUPS:
+            logger.info(f'Loading and writing {key_group.log_name} data')
+            for key in key_group:
+                builder.load_and_write_data(artifact, key, location, draws, by_draw, float32, by_province, verify)
 
     logger.info('**DONE**')
 
 
+def compare_artifacts(reference_path: Union[str, Path], candidate_path: Union[str, Path],
+                      rtol: float = 1e-5, atol: float = 1e-8, output_path: Union[str, Path] = None) -> pd.DataFrame:
+    """Compares every data key in two artifacts within a tolerance.
+
+    Intended for checking a float32 build against a float64 build of the
+    same location and draws.
+
+    Parameters
+    ----------
+    reference_path
+        The path to the reference artifact.
+    candidate_path
+        The path to the artifact to check against the reference.
+    rtol
+        The relative tolerance, as in :func:`numpy.allclose`.
+    atol
+        The absolute tolerance, as in :func:`numpy.allclose`.
+    output_path
+        If provided, the path to write the report to as a csv.
+
+    Returns
+    -------
+        A report with one row per key giving the candidate dtypes, the
+        largest absolute and relative differences and whether the key is
+        within tolerance.
+
+    """
+    reference, candidate = Artifact(str(reference_path)), Artifact(str(candidate_path))
+
+    report = []
+    for key in [key for key in reference.keys if not key.startswith('metadata.')]:
+        row = {'key': key, 'dtypes': None, 'max_abs_diff': np.nan, 'max_rel_diff': np.nan}
+        if key not in candidate:
+            row['within_tolerance'] = False
+            report.append(row)
+            continue
+
+        reference_data = _load_artifact_data(reference, key)
+        candidate_data = _load_artifact_data(candidate, key)
+        if isinstance(reference_data, pd.DataFrame):
+            reference_values = reference_data.select_dtypes('number')
+            candidate_values = candidate_data.reindex(reference_values.index)[reference_values.columns]
+            row['dtypes'] = ','.join(sorted({str(dtype) for dtype in candidate_values.dtypes}))
+            reference_values = reference_values.values.astype(np.float64)
+            candidate_values = candidate_values.values.astype(np.float64)
+            abs_diff = np.abs(candidate_values - reference_values)
+            row['max_abs_diff'] = np.nanmax(abs_diff) if abs_diff.size else 0.0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rel_diff = np.where(reference_values != 0, abs_diff / np.abs(reference_values), 0)
+            row['max_rel_diff'] = np.nanmax(rel_diff) if rel_diff.size else 0.0
+            row['within_tolerance'] = bool(np.allclose(candidate_values, reference_values,
+                                                       rtol=rtol, atol=atol, equal_nan=True))
+        else:
+            row['within_tolerance'] = reference_data == candidate_data
+        report.append(row)
+
+    report = pd.DataFrame(report, columns=['key', 'dtypes', 'max_abs_diff', 'max_rel_diff', 'within_tolerance'])
+    for row in report.itertuples():
+        logger.info(f'{row.key:<70}: {"ok" if row.within_tolerance else "FAILED":>6} '
+                    f'(max abs diff {row.max_abs_diff:.3g}, max rel diff {row.max_rel_diff:.3g})')
+    if output_path is not None:
+        report.to_csv(output_path, index=False)
+    return report
+
+
+def _load_artifact_data(artifact: Artifact, key: str):
+    """Loads all draws for key, whether or not it was written by draw."""
+    if is_stored_by_draw(artifact.path, key):
+        entity_key = EntityKey(key)
+        with pd.HDFStore(str(artifact.path), mode='r') as store:
+            index = store.get(f'{entity_key.path}/index')
+            columns = sorted([node.split('/')[-1] for node in store.keys()
+                              if node.startswith(f'{entity_key.path}/draw_')],
+                             key=lambda column: int(column.split('_')[-1]))
+            values = {column: store.get(f'{entity_key.path}/{column}').values for column in columns}
+        return pd.DataFrame(values, index=pd.MultiIndex.from_frame(index), columns=columns)
+    return artifact.load(key)
+
+
 if __name__ == "__main__":
-    artifact_path = sys.argv[1]
-    artifact_location = sys.argv[2]
-    build_single_location_artifact(artifact_path, artifact_location, log_to_file=True)
+    parser = argparse.ArgumentParser(description='Build a single location artifact.')
+    parser.add_argument('path')
+    parser.add_argument('location')
+    parser.add_argument('--draws', type=parse_draws, default=None)
+    parser.add_argument('--by-draw', action='store_true')
+    parser.add_argument('--float32', action='store_true')
+    parser.add_argument('--by-province', action='store_true')
+    parser.add_argument('--verify', action='store_true')
+    args = parser.parse_args()
+    build_single_location_artifact(args.path, args.location, args.draws, args.by_draw, args.float32,
+                                   args.by_province, verify=args.verify, log_to_file=True)
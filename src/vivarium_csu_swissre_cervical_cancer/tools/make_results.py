@@ -1,28 +1,98 @@
 from pathlib import Path
 import shutil
+from typing import Dict, List, Tuple
 
 from loguru import logger
+import numpy as np
 
+from vivarium_csu_swissre_cervical_cancer import metadata, results, scenarios
 from vivarium_csu_swissre_cervical_cancer.results_processing import process_results
 
+AGGREGATE_FILE_NAME = 'aggregated_output.hdf'
+MISSING_CELLS_FILE_NAME = 'missing_cells.csv'
+AGGREGATE_STATE_FILE_NAME = 'aggregate_state.hdf'
 
-def build_results(output_file: str, single_run: bool):
+
+def build_results(output_file: str, single_run: bool, chunksize: int = metadata.MAKE_RESULTS_CHUNK_SIZE,
+                  workers: int = 1, formats: Tuple[str, ...] = ('hdf',),
+                  percentiles: Tuple[float, ...] = process_results.SUMMARY_PERCENTILES, incremental: bool = False,
+                  summarize_comparisons: bool = False):
     output_file = Path(output_file)
-    measure_dir = output_file.parent / 'count_data'
-    if measure_dir.exists():
-        shutil.rmtree(measure_dir)
-    measure_dir.mkdir(exist_ok=True, mode=0o775)
+    measure_dir = _make_output_dir(output_file.parent / 'count_data')
+    summary_dir = _make_output_dir(output_file.parent / 'summary_data')
+
+    keyspace = process_results.read_keyspace(output_file, single_run)
+    if incremental:
+        aggregator = _load_aggregate_state(output_file, keyspace)
+    else:
+        aggregator = process_results.SeedAggregator(keyspace)
+    start = aggregator.rows_read if incremental else 0
+
+    logger.info(f'Reading in output data from {str(output_file)} from row {start} in chunks of {chunksize} rows.')
+    for chunk_start, chunk in process_results.read_data_chunks(output_file, single_run, chunksize, start):
+        aggregator.add(chunk, chunk_start + np.arange(len(chunk)))
+        logger.info(f'Aggregated {chunk_start + len(chunk)} rows over random seeds.')
 
-    logger.info(f'Reading in output data from {str(output_file)}.')
-    data, keyspace = process_results.read_data(output_file, single_run)
     logger.info(f'Filtering incomplete data from outputs.')
-    rows = len(data)
-    data = process_results.filter_out_incomplete(data, keyspace)
-    new_rows = len(data)
-    logger.info(f'Filtered {rows - new_rows} from data due to incomplete information.  {new_rows} remaining.')
-    data = process_results.aggregate_over_seed(data)
+    incomplete = aggregator.get_incomplete_rows()
+    if incremental:
+        state_file = output_file.parent / AGGREGATE_STATE_FILE_NAME
+        logger.info(f'Holding {len(incomplete)} rows of incomplete seeds in {str(state_file)} for later runs.')
+        aggregator.save(state_file)
+    else:
+        for _, chunk in process_results.read_data_rows(output_file, single_run, incomplete['position'], chunksize):
+            aggregator.subtract(chunk)
+    rows = len(aggregator.cells)
+    logger.info(f'Filtered {len(incomplete)} from data due to incomplete information.  '
+                f'{rows - len(incomplete)} remaining.')
+    missing = aggregator.get_missing_cells()
+    missing_file = output_file.parent / MISSING_CELLS_FILE_NAME
+    logger.info(f'{len(missing)} (draw, seed, scenario) cells of the keyspace are missing from outputs.  '
+                f'Writing them to {str(missing_file)} for rerun.')
+    missing.to_csv(missing_file, index=False)
+    aggregate_file = output_file.parent / AGGREGATE_FILE_NAME
+    logger.info(f'Writing output aggregated over random seeds to {str(aggregate_file)}.')
+    process_results.write_measure_columns(aggregator.to_frame(), aggregate_file)
     logger.info(f'Computing raw count and proportion data.')
-    measure_data = process_results.make_measure_data(data)
-    logger.info(f'Writing raw count and proportion data to {str(measure_dir)}')
-    measure_data.dump(measure_dir)
+    measure_data = process_results.make_measure_data_from_store(aggregate_file, workers)
+    logger.info(f'Writing raw count and proportion data to {str(measure_dir)} as {", ".join(formats)}.')
+    measure_data.dump(measure_dir, formats, workers)
+    logger.info(f'Summarizing count data over draws.')
+    summary_data = measure_data.summarize(percentiles)
+    logger.info(f'Writing summary data to {str(summary_dir)} as {", ".join(formats)}.')
+    summary_data.dump(summary_dir, formats, workers)
+
+    compared_scenarios = [scenarios.SCENARIOS.baseline, scenarios.SCENARIOS.alternative]
+    if set(compared_scenarios) <= set(keyspace[results.OUTPUT_SCENARIO_COLUMN]):
+        logger.info(f'Comparing the {" and ".join(compared_scenarios)} scenarios by draw.')
+        comparison_data = measure_data.compare(*compared_scenarios)
+        comparison_dir = _make_output_dir(output_file.parent / 'comparison_data')
+        logger.info(f'Writing scenario comparison data to {str(comparison_dir)} as {", ".join(formats)}.')
+        comparison_data.dump(comparison_dir, formats, workers)
+        if summarize_comparisons:
+            comparison_summary_dir = _make_output_dir(output_file.parent / 'comparison_summary_data')
+            logger.info(f'Writing scenario comparison summary data to {str(comparison_summary_dir)}.')
+            comparison_data.summarize(percentiles).dump(comparison_summary_dir, formats, workers)
+    else:
+        logger.info(f'Outputs do not include both of the {" and ".join(compared_scenarios)} scenarios.  '
+                    f'Skipping scenario comparisons.')
     logger.info('**DONE**')
+
+
+def _load_aggregate_state(output_file: Path, keyspace: Dict[str, List]) -> process_results.IncrementalSeedAggregator:
+    state_file = output_file.parent / AGGREGATE_STATE_FILE_NAME
+    aggregator = process_results.IncrementalSeedAggregator.load(state_file, keyspace)
+    if aggregator.rows_read > process_results.read_row_count(output_file):
+        logger.info(f'Output in {str(output_file)} has fewer rows than were aggregated into {str(state_file)}.  '
+                    f'Aggregating from scratch.')
+        aggregator = process_results.IncrementalSeedAggregator(keyspace)
+    elif aggregator.rows_read:
+        logger.info(f'Resuming from {aggregator.rows_read} rows already aggregated in {str(state_file)}.')
+    return aggregator
+
+
+def _make_output_dir(output_dir: Path) -> Path:
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    output_dir.mkdir(exist_ok=True, mode=0o775)
+    return output_dir
@@ -1,15 +1,20 @@
 from pathlib import Path
 from scipy.stats import norm
-from typing import Union, List
+from typing import Dict, Iterable, List, Union
+import typing
 
 import click
 import numpy as np
 import pandas as pd
 from loguru import logger
 from scipy.stats import truncnorm
+from vivarium.framework.artifact import EntityKey
 from vivarium.framework.randomness import get_hash
 
-from vivarium_csu_swissre_cervical_cancer.constants import metadata
+from vivarium_csu_swissre_cervical_cancer.constants import data_keys, metadata
+
+if typing.TYPE_CHECKING:
+    from vivarium.framework.engine import Builder
 
 
 class TruncnormDist:
@@ -63,6 +68,18 @@ def get_lognormal_random_variable(mean: float, sd: float, seed: str, draw: int)
     return np.random.lognormal(mean, sd)
 
 
+def get_lognormal_random_variables(mean: float, sd: float, seed: str, draws: Iterable[int]) -> np.ndarray:
+    """Evaluates :func:`get_lognormal_random_variable` for many draws at once.
+
+    Each draw is seeded from its own hash, so the draws cannot share one
+    generator without changing their values. Each draw samples from its own
+    ``RandomState`` with the same lognormal algorithm, so values are
+    identical to the scalar version and the global random state is left
+    untouched.
+    """
+    return np.array([np.random.RandomState(get_hash(f'{seed}_draw_{draw}')).lognormal(mean, sd) for draw in draws])
+
+
 def len_longest_location() -> int:
     """Returns the length of the longest location in the project.
 
@@ -91,6 +108,39 @@ def sanitize_location(location: str):
     return location.replace(" ", "_").replace("'", "_").lower()
 
 
+def parse_draws(draws: str) -> List[int]:
+    """Parses a draw specification like ``"0-99,250"`` into a sorted list of draws.
+
+    Parameters
+    ----------
+    draws
+        Comma separated draws or inclusive ``start-end`` draw ranges.
+
+    Returns
+    -------
+        The unique draws, sorted.
+
+    Raises
+    ------
+    ValueError
+        If the specification is malformed or names a draw outside the
+        available input draws.
+
+    """
+    parsed = set()
+    for part in draws.split(','):
+        part = part.strip()
+        if '-' in part:
+            start, end = part.split('-')
+            parsed.update(range(int(start), int(end) + 1))
+        else:
+            parsed.add(int(part))
+    invalid = [d for d in parsed if not 0 <= d < metadata.DRAW_COUNT]
+    if not parsed or invalid:
+        raise ValueError(f'Draws must be between 0 and {metadata.DRAW_COUNT - 1}. You specified "{draws}".')
+    return sorted(parsed)
+
+
 def delete_if_exists(*paths: Union[Path, List[Path]], confirm=False):
     paths = paths[0] if isinstance(paths[0], list) else paths
     existing_paths = [p for p in paths if p.exists()]
@@ -106,6 +156,113 @@ def delete_if_exists(*paths: Union[Path, List[Path]], confirm=False):
             p.unlink()
 
 
+def is_stored_by_draw(artifact_path: Union[str, Path], key: str) -> bool:
+    """Whether the data for key was written with :func:`builder.write_data_by_draw`."""
+    with pd.HDFStore(str(artifact_path), mode='r') as store:
+        return f'{EntityKey(key).path}/index' in store
+
+
+def read_data_by_draw(artifact_path: Union[str, Path], key: str, draw: int) -> pd.DataFrame:
+    """Reads a single draw of data written on a per-draw basis.
+
+    Only the index block and the requested draw column are read. The result
+    is shaped like the output of ``builder.data.load``: demographic columns
+    plus a ``value`` column, with no location column.
+
+    Parameters
+    ----------
+    artifact_path
+        Path to the artifact.
+    key
+        The entity key associated with the data to read.
+    draw
+        The input draw to read.
+
+    Returns
+    -------
+        The data for the requested draw.
+
+    """
+    key = EntityKey(key)
+    with pd.HDFStore(str(artifact_path), mode='r') as store:
+        index = store.get(f'{key.path}/index')
+        values = store.get(f'{key.path}/draw_{draw}')
+    data = index.assign(value=values.values)
+    return data.drop(columns=[c for c in ['location', 'draw'] if c in data.columns])
+
+
+def load_draw_data(builder: 'Builder', key: str) -> pd.DataFrame:
+    """Loads data for key at the simulation's input draw.
+
+    Keys stored by draw are read directly from the artifact one draw at a
+    time. Everything else goes through the usual artifact manager. Keys
+    stored by province are combined with the province weights recorded in
+    the artifact, which can be replaced to reweight without a rebuild. Keys
+    in ``data_keys.PROVINCE_RATIO_KEYS`` are the ratio of their combined
+    numerator and denominator keys instead.
+
+    """
+    artifact_path = builder.configuration.input_data.artifact_path
+    if artifact_path and is_stored_by_draw(artifact_path, key):
+        data = read_data_by_draw(artifact_path, key, builder.configuration.input_data.input_draw_number)
+    else:
+        data = builder.data.load(key)
+
+    if 'province' in data.columns:
+        if key in data_keys.PROVINCE_RATIO_KEYS:
+            numerator, denominator = [get_values(load_draw_data(builder, ratio_key))
+                                      for ratio_key in data_keys.PROVINCE_RATIO_KEYS[key]]
+            data = (numerator / denominator).rename('value').reset_index()
+        else:
+            data = combine_provinces(data, builder.data.load(data_keys.METADATA_PROVINCE_WEIGHTS))
+    return data
+
+
+def get_values(data: pd.DataFrame) -> pd.Series:
+    """Gets the ``value`` column of loaded data indexed by its other columns."""
+    return data.set_index([c for c in data.columns if c != 'value'])['value']
+
+
+def combine_provinces(data: pd.DataFrame, province_weights: Dict[str, float]) -> pd.DataFrame:
+    """Combines data stored by province into a single weighted value per row.
+
+    Provinces missing from ``province_weights`` are dropped, so weights for
+    a single province give that province's data alone.
+
+    Parameters
+    ----------
+    data
+        Data with a ``province`` column, a ``value`` column and demographic
+        columns.
+    province_weights
+        The weight of each province to combine.
+
+    Returns
+    -------
+        The data with the provinces combined, in the same shape but without
+        the ``province`` column.
+
+    """
+    provinces = list(province_weights)
+    data = data[data['province'].isin(provinces)]
+    demographic_columns = [c for c in data.columns if c not in ['province', 'value']]
+    data = data.sort_values(demographic_columns)
+
+    # Rows are sorted by demography, so a row starts wherever the demographic columns change.
+    demography = data[demographic_columns]
+    is_new_row = (demography != demography.shift()).any(axis=1).values
+    row_codes = np.cumsum(is_new_row) - 1
+    province_codes = pd.Categorical(data['province'], categories=provinces).codes
+
+    values = np.full((is_new_row.sum(), len(provinces)), np.nan, dtype=data['value'].dtype)
+    values[row_codes, province_codes] = data['value'].values
+    weights = np.array([province_weights[province] for province in provinces], dtype=values.dtype)
+
+    combined = demography[is_new_row].reset_index(drop=True)
+    combined['value'] = values.dot(weights) / weights.sum()
+    return combined
+
+
 def get_normal_dist_random_variable(mean: float, stddev: float, draw: int) -> float:
     return norm(loc=mean, scale=stddev).ppf(draw)
 
@@ -0,0 +1,204 @@
+import itertools
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('vivarium_inputs')
+pytest.importorskip('gbd_mapping')
+
+from vivarium_csu_swissre_cervical_cancer import data_keys, data_values, metadata, paths, utilities
+from vivarium_csu_swissre_cervical_cancer.data import cache, loader
+
+Sequela = namedtuple('Sequela', ['name'])
+SEQUELAE = [Sequela('first_sequela'), Sequela('second_sequela')]
+DRAWS = (0, 1)
+
+
+def get_index(province):
+    ages = [0, 5, 10]
+    # Heilongjiang has no data for the last age group, so it stays missing after province weighting.
+    if province == 'Heilongjiang':
+        ages = ages[:-1]
+    return pd.MultiIndex.from_tuples([(province, 'Female', age, age + 5, 2020, 2021) for age in ages],
+                                     names=loader.ARTIFACT_INDEX_COLUMNS)
+
+
+def measure_source(sequela, measure, location):
+    index = get_index(location)
+    seed = sum(map(ord, f'{sequela.name}{measure}{location}'))
+    values = np.random.RandomState(seed).uniform(0.1, 0.9, size=(len(index), len(DRAWS)))
+    data = pd.DataFrame(values, index=index, columns=loader.get_draw_columns(DRAWS))
+    if location == 'Tianjin' and measure == 'prevalence':
+        # No prevalence at all in the first age group.
+        data.iloc[0] = 0.
+    if location == 'Jiangsu' and sequela == SEQUELAE[1]:
+        # The second sequela is missing a row the first one has.
+        data = data.iloc[1:]
+    return data
+
+
+def get_baseline_disability_weight():
+    location_weighted_disability_weight = 0
+    for province, province_weight in data_keys.SWISSRE_LOCATION_WEIGHTS.items():
+        prevalence_disability_weight = 0
+        total_sequela_prevalence = 0
+        for sequela in SEQUELAE:
+            prevalence, disability_weight = [
+                measure_source(sequela, measure, province).reset_index().assign(location=metadata.LOCATIONS[0])
+                .set_index(loader.ARTIFACT_INDEX_COLUMNS)
+                for measure in ['prevalence', 'disability_weight']
+            ]
+            prevalence_disability_weight += prevalence * disability_weight
+            total_sequela_prevalence += prevalence
+        disability_weight = (prevalence_disability_weight / total_sequela_prevalence).fillna(0)
+        location_weighted_disability_weight += disability_weight * province_weight
+    return location_weighted_disability_weight / sum(data_keys.SWISSRE_LOCATION_WEIGHTS.values())
+
+
+def test_load_disability_weight_from_measure_source(monkeypatch, tmp_path):
+    monkeypatch.setattr(loader.causes.cervical_cancer, 'sequelae', SEQUELAE, raising=False)
+    cache.set_cache_dir(tmp_path)
+    try:
+        disability_weight = loader.load_disability_weight(data_keys.CERVICAL_CANCER.DISABILITY_WEIGHT,
+                                                          metadata.LOCATIONS[0], DRAWS, measure_source)
+    finally:
+        cache.set_cache_dir(None)
+
+    expected = get_baseline_disability_weight()
+    pd.testing.assert_frame_equal(disability_weight.sort_index(), expected.sort_index(), check_names=False)
+    assert disability_weight.iloc[:-1].notnull().all().all()
+    assert disability_weight.iloc[-1].isnull().all()
+    # Data from anything other than the GBD is never cached.
+    assert not list(tmp_path.iterdir())
+
+
+AGE_BINS = pd.DataFrame({
+    'age_group_name': ['5 to 9', '10 to 14', '15 to 19', '20 to 24', '95 plus'],
+    'age_group_years_start': [5., 10., 15., 20., 95.],
+    'age_group_years_end': [10., 15., 20., 25., 125.],
+})
+FORECAST_DRAWS = (0, 1, 2, 3)
+
+
+@pytest.fixture
+def age_bins(monkeypatch):
+    monkeypatch.setattr(loader.gbd, 'get_age_bins', lambda: AGE_BINS.copy(), raising=False)
+    loader._load_age_bins.cache_clear()
+    cache.clear_memory_cache()
+    yield
+    loader._load_age_bins.cache_clear()
+    cache.clear_memory_cache()
+
+
+@pytest.fixture
+def forecast_path(tmp_path, monkeypatch):
+    """A raw forecast file with a province outside the project and a row missing for one province."""
+    rows = list(itertools.product(list(data_keys.SWISSRE_LOCATION_WEIGHTS) + ['Beijing'], AGE_BINS['age_group_name'],
+                                  ['Female'], [2020, 2021], FORECAST_DRAWS))
+    data = pd.DataFrame(rows, columns=['location_id', 'age_group_id', 'sex_id', 'year_id', 'draw'])
+    data['scenario'] = 0
+    data['noised_forecast'] = np.random.RandomState(0).uniform(0, 0.01, size=len(data))
+    data = data.drop(data.index[(data['location_id'] == 'Henan') & (data['age_group_id'] == '20 to 24')
+                                & (data['year_id'] == 2021) & (data['draw'] == 2)])
+    path = tmp_path / 'forecast.csv'
+    data.sample(frac=1, random_state=1).to_csv(path, index=False)
+    monkeypatch.setattr(metadata, 'MAKE_ARTIFACT_CSV_CHUNK_SIZE', 25)
+    return path
+
+
+def test_parse_raw_data(age_bins, forecast_path):
+    parsed = loader._parse_raw_data(forecast_path)
+
+    # Lay the parsed data out with draws in the index and provinces as columns, as it was originally parsed.
+    parsed = parsed.set_index(loader.ARTIFACT_INDEX_COLUMNS + ['draw'])['noised_forecast'].unstack(level=0)
+    parsed.columns = list(parsed.columns)
+    expected = old_parse_raw_data(forecast_path)
+    pd.testing.assert_frame_equal(parsed.sort_index(), expected.sort_index()[parsed.columns], check_index_type=False)
+
+
+@pytest.mark.parametrize('draws', [FORECAST_DRAWS, (1, 3)])
+def test_transform_raw_data(age_bins, forecast_path, draws):
+    data = loader._transform_raw_data(metadata.LOCATIONS[0], forecast_path, False, draws)
+
+    expected = old_transform_raw_data(metadata.LOCATIONS[0], forecast_path)[loader.get_draw_columns(draws)]
+    pd.testing.assert_frame_equal(data.sort_index(), expected.sort_index(), check_index_type=False)
+    assert data.isnull().sum().sum() == (2 in draws)
+
+
+def test_hrhpv_rr_and_paf(tmp_path, monkeypatch):
+    index = pd.MultiIndex.from_tuples([(metadata.LOCATIONS[0], 'Female', float(age), age + 1., 2020, 2021)
+                                       for age in range(15, 20)], names=loader.ARTIFACT_INDEX_COLUMNS)
+    prevalence = pd.DataFrame(np.random.RandomState(0).uniform(0, 0.2, size=(len(index), 10)), index=index,
+                              columns=loader.get_draw_columns(range(10)))
+    path = tmp_path / 'hrhpv_prevalence.csv'
+    prevalence.reset_index().rename_axis('Unnamed: 0').reset_index().to_csv(path, index=False)
+    monkeypatch.setattr(paths, 'HRHPV_PREVALENCE_PATH', path)
+    draws = (0, 3, 7)
+    loader._load_hrhpv_rr_and_paf.cache_clear()
+    try:
+        rr, paf = loader.load_hrhpv_rr_and_paf(metadata.LOCATIONS[0], draws)
+        # Callers get copies of the shared values.
+        rr.loc[:], paf.loc[:] = 0, 0
+        rr, paf = loader.load_hrhpv_rr_and_paf(metadata.LOCATIONS[0], draws)
+    finally:
+        loader._load_hrhpv_rr_and_paf.cache_clear()
+
+    columns = loader.get_draw_columns(draws)
+    expected_rr = pd.Series([utilities.get_lognormal_random_variable(*data_values.RR_HRHPV_PARAMS, draw)
+                             for draw in draws], index=columns)
+    pd.testing.assert_series_equal(rr, expected_rr, check_exact=True)
+    excess = prevalence[columns].multiply(expected_rr - 1, axis=1)
+    pd.testing.assert_frame_equal(paf, excess / (excess + 1), check_index_type=False)
+
+
+# The original implementations, which held every province of a raw file as a wide table.
+
+def old_parse_raw_data(data_path):
+    raw_data = pd.read_csv(data_path)
+    age_bins = AGE_BINS.set_index('age_group_name')
+
+    processed_data = raw_data[raw_data['location_id'].isin(data_keys.SWISSRE_LOCATION_WEIGHTS)]
+    processed_data = (
+        processed_data
+        .set_index('age_group_id')
+        .join(age_bins, how='left')
+        .reset_index()
+        .rename(columns={
+            'age_group_years_start': 'age_start',
+            'age_group_years_end': 'age_end',
+            'year_id': 'year_start',
+            'sex_id': 'sex',
+            'location_id': 'location',
+        })
+    )
+    processed_data = processed_data[(processed_data['age_start'] >= data_values.YOUNGEST_SIMULANT_AGE)
+                                    & (processed_data['age_end'] >= data_values.YOUNGEST_SIMULANT_AGE)]
+    processed_data['year_end'] = processed_data['year_start'] + 1
+    processed_data = processed_data[loader.ARTIFACT_INDEX_COLUMNS + ['draw', 'noised_forecast']]
+    processed_data['draw'] = pd.to_numeric(processed_data['draw'])
+    processed_data = (
+        processed_data
+        .set_index(loader.ARTIFACT_INDEX_COLUMNS + ['draw'])
+        .unstack(level=0)
+    )
+    processed_data.columns = [c[1] for c in processed_data.columns]
+    return processed_data
+
+
+def old_transform_raw_data(location, data_path):
+    processed_data = old_parse_raw_data(data_path)
+    processed_data['location'] = location
+    processed_data['value'] = (sum(processed_data[province] * weight for province, weight
+                                   in data_keys.SWISSRE_LOCATION_WEIGHTS.items())
+                               / sum(data_keys.SWISSRE_LOCATION_WEIGHTS.values()))
+    processed_data = (
+        processed_data
+        .drop(list(data_keys.SWISSRE_LOCATION_WEIGHTS), axis=1)
+        .reset_index()
+        .set_index(loader.ARTIFACT_INDEX_COLUMNS + ['draw'])
+        .unstack()
+    )
+    processed_data.columns = [c[1] for c in processed_data.columns]
+    return processed_data.rename(columns={column: f'draw_{column}' for column in processed_data.columns})
@@ -0,0 +1,260 @@
+"""Checks the results processing against the straightforward pandas implementations it replaced."""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('vivarium_public_health')
+
+from vivarium_csu_swissre_cervical_cancer import results
+from vivarium_csu_swissre_cervical_cancer.results_processing import process_results
+
+DRAWS = [0, 1, 2]
+SEEDS = [0, 1, 2, 3]
+SCENARIOS = ['baseline', 'alternative']
+KEYSPACE = {
+    results.INPUT_DRAW_COLUMN: DRAWS,
+    results.RANDOM_SEED_COLUMN: SEEDS,
+    results.OUTPUT_SCENARIO_COLUMN: SCENARIOS,
+}
+# Cells missing from the output, so their seeds are incomplete.
+MISSING_CELLS = [(1, 2, 'alternative'), (2, 0, 'baseline')]
+# Cells outside the keyspace.
+EXTRA_CELLS = [(7, 0, 'baseline')]
+CHUNKSIZE = 5
+
+
+@pytest.fixture(scope='module')
+def output():
+    """Cleaned simulation output in a shuffled row order."""
+    random = np.random.RandomState(0)
+    cells = [(draw, seed, scenario) for draw in DRAWS for seed in SEEDS for scenario in SCENARIOS
+             if (draw, seed, scenario) not in MISSING_CELLS] + EXTRA_CELLS
+    random.shuffle(cells)
+    columns = list(dict.fromkeys(sum([process_results.get_measure_columns(measure)
+                                      for measure in process_results.MeasureData._fields], [])
+                                 + results.RESULT_COLUMNS()))
+    data = pd.DataFrame({column: random.rand(len(cells)) * 10 if 'person_time' in column or column[:3] in ['yll', 'yld']
+                         else random.randint(0, 5, len(cells))
+                         for column in columns}, columns=columns)
+    data[results.INPUT_DRAW_COLUMN] = [cell[0] for cell in cells]
+    data[results.RANDOM_SEED_COLUMN] = [cell[1] for cell in cells]
+    data[process_results.SCENARIO_COLUMN] = [cell[2] for cell in cells]
+    return data
+
+
+@pytest.fixture(scope='module')
+def aggregated_output(output):
+    return old_aggregate_over_seed(old_filter_out_incomplete(output, KEYSPACE))
+
+
+@pytest.fixture(scope='module')
+def measure_data(aggregated_output):
+    return old_make_measure_data(aggregated_output)
+
+
+def get_chunks(data):
+    for start in range(0, len(data), CHUNKSIZE):
+        yield start + np.arange(len(data.iloc[start:start + CHUNKSIZE])), data.iloc[start:start + CHUNKSIZE]
+
+
+def assert_count_data_equal(count_data, expected):
+    expected = expected.drop(columns=results.RANDOM_SEED_COLUMN)
+    pd.testing.assert_frame_equal(count_data[expected.columns], expected, check_dtype=False, check_exact=False)
+    assert list(count_data.columns) == list(expected.columns)
+
+
+def assert_measures_equal(data, expected):
+    data, expected = to_object(data), to_object(expected)
+    pd.testing.assert_frame_equal(data, expected, check_dtype=False, check_exact=False)
+
+
+def to_object(data):
+    return data.astype({column: object for column in data.columns
+                        if pd.api.types.is_string_dtype(data[column])
+                        or isinstance(data[column].dtype, pd.CategoricalDtype)})
+
+
+def test_seed_aggregator(output, aggregated_output):
+    aggregator = process_results.SeedAggregator(KEYSPACE)
+    for positions, chunk in get_chunks(output):
+        aggregator.add(chunk, positions)
+    aggregator.subtract(output.iloc[aggregator.get_incomplete_rows()['position'].values])
+
+    assert_count_data_equal(aggregator.to_frame(), aggregated_output)
+    missing = aggregator.get_missing_cells()
+    assert sorted(map(tuple, missing.values.tolist())) == sorted(MISSING_CELLS)
+
+
+def test_incremental_seed_aggregator(output, aggregated_output, tmp_path):
+    state_file = tmp_path / 'aggregate_state.hdf'
+    for stop in [3, 11, 11, len(output)]:
+        aggregator = process_results.IncrementalSeedAggregator.load(state_file, KEYSPACE)
+        start = aggregator.rows_read
+        for positions, chunk in get_chunks(output.iloc[start:stop]):
+            aggregator.add(chunk, start + positions)
+        aggregator.save(state_file)
+
+    assert aggregator.rows_read == len(output)
+    assert_count_data_equal(aggregator.to_frame(), aggregated_output)
+
+
+def test_make_measure_data(aggregated_output, measure_data):
+    new_measure_data = process_results.make_measure_data(aggregated_output.drop(columns=results.RANDOM_SEED_COLUMN))
+    for measure in process_results.MeasureData._fields:
+        assert_measures_equal(getattr(new_measure_data, measure), getattr(measure_data, measure))
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_make_measure_data_from_store(aggregated_output, measure_data, tmp_path, workers):
+    path = tmp_path / 'aggregated_output.hdf'
+    process_results.write_measure_columns(aggregated_output, path)
+    new_measure_data = process_results.make_measure_data_from_store(path, workers)
+    for measure in process_results.MeasureData._fields:
+        assert_measures_equal(getattr(new_measure_data, measure), getattr(measure_data, measure))
+
+
+@pytest.mark.parametrize('measure', ['deaths', 'screening_state_person_time'])
+def test_summarize_over_draws(measure_data, measure):
+    data = getattr(measure_data, measure)
+    # Drop a draw from some cells.
+    data = data.drop(data.index[data[results.INPUT_DRAW_COLUMN] == 0][::2])
+    cell_columns = [c for c in data.columns if c not in [results.INPUT_DRAW_COLUMN, 'value']]
+
+    summary = process_results.summarize_over_draws(data, [2.5, 97.5])
+
+    grouped = fill_cells(data, cell_columns).groupby(cell_columns)['value']
+    expected = pd.concat([grouped.mean().rename('mean'), grouped.median().rename('median'),
+                          grouped.quantile(0.025).rename('2.5%'), grouped.quantile(0.975).rename('97.5%')], axis=1)
+    expected = unfill_cells(expected.reset_index(), cell_columns)
+    assert_measures_equal(sort_cells(summary, cell_columns), sort_cells(expected, cell_columns))
+
+
+@pytest.mark.parametrize('measure', ['deaths', 'screening_state_person_time'])
+def test_compare_scenarios(measure_data, measure):
+    data = getattr(measure_data, measure)
+    # Drop the alternative from some cells, so they have no comparison.
+    data = data.drop(data.index[data[process_results.SCENARIO_COLUMN] == 'alternative'][::3])
+    scenario = process_results.SCENARIO_COLUMN
+    cell_columns = [c for c in data.columns if c not in [scenario, 'value']]
+
+    comparison = process_results.compare_scenarios(data, 'baseline', 'alternative')
+
+    filled = fill_cells(data, cell_columns)
+    paired = (filled.loc[filled[scenario] == 'baseline', cell_columns + ['value']]
+              .merge(filled.loc[filled[scenario] == 'alternative', cell_columns + ['value']],
+                     on=cell_columns, suffixes=('_baseline', '_alternative')))
+    expected = pd.concat([
+        paired[cell_columns].assign(comparison='averted', value=paired['value_baseline'] - paired['value_alternative']),
+        paired[cell_columns].assign(comparison='ratio', value=paired['value_alternative'] / paired['value_baseline']),
+    ], ignore_index=True)
+    expected = unfill_cells(expected, cell_columns)
+    sort_columns = cell_columns + [process_results.COMPARISON_COLUMN]
+    assert_measures_equal(sort_cells(comparison, sort_columns), sort_cells(expected, sort_columns)[comparison.columns])
+
+
+FILL_VALUE = '__missing__'
+
+
+def fill_cells(data, columns):
+    # Old pandas groupby drops missing keys.
+    return data.assign(**{c: data[c].astype(object).fillna(FILL_VALUE) for c in columns if data[c].isnull().any()})
+
+
+def unfill_cells(data, columns):
+    return data.assign(**{c: data[c].replace(FILL_VALUE, np.nan) for c in columns
+                          if (data[c].astype(object) == FILL_VALUE).any()})
+
+
+def sort_cells(data, columns):
+    return to_object(data).sort_values(columns).reset_index(drop=True)
+
+
+# The original implementations, which loaded and reshaped the whole output table.
+
+def old_filter_out_incomplete(data, keyspace):
+    output = []
+    for draw in keyspace[results.INPUT_DRAW_COLUMN]:
+        # For each draw, gather all random seeds completed for all scenarios.
+        random_seeds = set(keyspace[results.RANDOM_SEED_COLUMN])
+        draw_data = data.loc[data[results.INPUT_DRAW_COLUMN] == draw]
+        for scenario in keyspace[results.OUTPUT_SCENARIO_COLUMN]:
+            seeds_in_data = draw_data.loc[data[process_results.SCENARIO_COLUMN] == scenario,
+                                          results.RANDOM_SEED_COLUMN].unique()
+            random_seeds = random_seeds.intersection(seeds_in_data)
+        draw_data = draw_data.loc[draw_data[results.RANDOM_SEED_COLUMN].isin(random_seeds)]
+        output.append(draw_data)
+    return pd.concat(output, ignore_index=True).reset_index(drop=True)
+
+
+def old_aggregate_over_seed(data):
+    non_count_columns = []
+    for non_count_template in results.NON_COUNT_TEMPLATES:
+        non_count_columns += results.RESULT_COLUMNS(non_count_template)
+    count_columns = [c for c in data.columns if c not in non_count_columns + process_results.GROUPBY_COLUMNS]
+    count_data = data[count_columns + process_results.GROUPBY_COLUMNS].groupby(process_results.GROUPBY_COLUMNS).sum()
+    return count_data.reset_index()
+
+
+def old_make_measure_data(data):
+    return process_results.MeasureData(
+        population=old_get_population_data(data),
+        person_time=old_get_measure_data(data, 'person_time'),
+        ylls=old_get_by_cause_measure_data(data, 'ylls'),
+        ylds=old_get_by_cause_measure_data(data, 'ylds'),
+        deaths=old_get_by_cause_measure_data(data, 'deaths'),
+        disease_state_person_time=old_get_state_person_time_measure_data(data, 'disease_state_person_time'),
+        screening_state_person_time=old_get_state_person_time_measure_data(data, 'screening_state_person_time'),
+        disease_transition_count=old_get_transition_count_measure_data(data, 'disease_transition_count'),
+        screening_transition_count=old_get_transition_count_measure_data(data, 'screening_transition_count'),
+        event_count=old_get_measure_data(data, 'event_count'),
+    )
+
+
+def old_pivot_data(data):
+    groupby_columns = process_results.GROUPBY_COLUMNS
+    return (data
+            .set_index(groupby_columns)
+            .stack()
+            .reset_index()
+            .rename(columns={f'level_{len(groupby_columns)}': 'process', 0: 'value'}))
+
+
+def old_split_processing_column(data):
+    split = data.process.str.split('_age_cohort_')
+    data['process'], data['age_cohort'] = split.str[0], split.str[1]
+    data['year'] = data.process.str.split('_in_').str[-1]
+    data['measure'] = data.process.str.split('_in_').str[:-1].apply(lambda x: '_in_'.join(x))
+    return data.drop(columns='process')
+
+
+def old_get_population_data(data):
+    total_pop = old_pivot_data(data[[results.TOTAL_POPULATION_COLUMN]
+                                    + results.RESULT_COLUMNS('population')
+                                    + process_results.GROUPBY_COLUMNS])
+    total_pop = total_pop.rename(columns={'process': 'measure'})
+    return process_results.sort_data(total_pop)
+
+
+def old_get_measure_data(data, measure):
+    data = old_pivot_data(data[results.RESULT_COLUMNS(measure) + process_results.GROUPBY_COLUMNS])
+    data = old_split_processing_column(data)
+    return process_results.sort_data(data)
+
+
+def old_get_by_cause_measure_data(data, measure):
+    data = old_get_measure_data(data, measure)
+    split = data.measure.str.split('_due_to_')
+    data['measure'], data['cause'] = split.str[0], split.str[1]
+    return process_results.sort_data(data)
+
+
+def old_get_state_person_time_measure_data(data, measure):
+    data = old_get_measure_data(data, measure)
+    data['measure'], data['cause'] = 'state_person_time', data.measure.str.split('_person_time').str[0]
+    return process_results.sort_data(data)
+
+
+def old_get_transition_count_measure_data(data, measure):
+    data = data.drop(columns=[c for c in data.columns if 'event_count' in c and '2041' in c])
+    data = old_get_measure_data(data, measure)
+    return process_results.sort_data(data)